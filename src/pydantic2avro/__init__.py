@@ -1,4 +1,15 @@
 import pydantic2avro.exceptions
+from pydantic2avro.annotation_normalizer import normalize_annotation
+from pydantic2avro.bulk_encoder import EncodedRecords, encode_many
 from pydantic2avro.enums import TimePrecision
+from pydantic2avro.lazy_view import LazyRecordView, lazy_view_class
+from pydantic2avro.model_maker import (AvroToPydanticModelMaker,
+                                       load_pydantic_models)
+from pydantic2avro.schema_artifacts import (SchemaArtifacts,
+                                            compile_schema_artifacts)
 from pydantic2avro.schema_maker import PydanticToAvroSchemaMaker
 from pydantic2avro.schema_options import DecimalOptions, SchemaOptions
+from pydantic2avro.size_calculator import (EncodedSizeCalculator,
+                                          batch_by_encoded_size)
+from pydantic2avro.union_index import UnionBranchIndex, get_union_branch_index
+from pydantic2avro.version import __version__
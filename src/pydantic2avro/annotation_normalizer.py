@@ -0,0 +1,99 @@
+import builtins
+import functools
+import operator
+import sys
+import types
+import typing
+from typing import Annotated, Any, ForwardRef, get_args, get_origin
+
+from .exceptions import UnsupportedTypeException
+
+UNION_ORIGINS = (types.UnionType, typing.Union)
+
+# attribute of the models holding their memo of normalized annotations, so
+# it goes away along with the model.
+_MEMO_ATTRIBUTE = "__pydantic2avro_normalized__"
+
+
+def is_union(type_: Any) -> bool:
+    return get_origin(type_) in UNION_ORIGINS
+
+
+def _make_union(members: tuple[Any, ...]) -> Any:
+    try:
+        # `X | Y` when every member supports it, so plain unions stay
+        # `types.UnionType` like the ones written with `|` in models.
+        return functools.reduce(operator.or_, members)
+    except TypeError:
+        return typing.Union[members]
+
+
+class _Normalizer:
+    def __init__(self, owner: type | None) -> None:
+        self.owner = owner
+        self.resolved_forward_ref = False
+
+    def resolve(self, forward_ref: str | ForwardRef) -> Any:
+        if self.owner is None:
+            raise UnsupportedTypeException(
+                f"can not resolve forward reference {forward_ref!r} without"
+                f" the model it is used in"
+            )
+
+        if isinstance(forward_ref, str):
+            forward_ref = ForwardRef(forward_ref)
+
+        module = sys.modules.get(self.owner.__module__)
+        globalns = dict(vars(module)) if module is not None else dict()
+        localns = {self.owner.__name__: self.owner}
+
+        self.resolved_forward_ref = True
+        return typing._eval_type(forward_ref, globalns, localns)  # type: ignore[attr-defined]
+
+    def normalize(self, type_: Any) -> Any:
+        if isinstance(type_, (str, ForwardRef)):
+            return self.normalize(self.resolve(type_))
+
+        if type_ is None:
+            return types.NoneType
+
+        origin = get_origin(type_)
+        args = get_args(type_)
+
+        if origin is Annotated:
+            return self.normalize(args[0])
+
+        if origin in UNION_ORIGINS:
+            return _make_union(tuple(self.normalize(arg) for arg in args))
+
+        if origin in (builtins.list, builtins.dict) and args:
+            return origin[tuple(self.normalize(arg) for arg in args)]
+
+        return type_
+
+
+def normalize_annotation(type_: Any, owner: type | None = None) -> Any:
+    """
+    Canonical form of the annotation `type_` for schema generation:
+    `Annotated` metadata is dropped, `typing.Optional`/`typing.Union` become
+    `X | Y` unions, `typing.List`/`typing.Dict` become `list`/`dict` and
+    forward references are resolved in the module of `owner`, the model
+    `type_` is used in. Results are memoized per annotation object of
+    `owner`.
+    """
+    if owner is None:
+        return _Normalizer(owner).normalize(type_)
+
+    # keyed by identity, annotations python considers equal may still list
+    # union members in a different order (e.g. `int | None`, `None | int`)
+    # and that order is the order of the avro union's branches.
+    memo = vars(owner).get(_MEMO_ATTRIBUTE)
+    if memo is None:
+        memo = dict()
+        type.__setattr__(owner, _MEMO_ATTRIBUTE, memo)
+
+    entry = memo.get(id(type_))
+    if entry is None or entry[0] is not type_:
+        entry = memo[id(type_)] = (type_, _Normalizer(owner).normalize(type_))
+
+    return entry[1]
@@ -0,0 +1,259 @@
+import bisect
+import contextlib
+import json
+import mmap
+import os
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Iterator, Sequence, Type
+
+from pydantic import BaseModel
+
+from .schema_component_types import AvroSchemaComponent
+from .schema_maker import PydanticToAvroSchemaMaker
+from .schema_options import SchemaOptions
+
+
+@lru_cache(maxsize=64)
+def _parse_schema_str(schema_str: str) -> Any:
+    # worker processes outlive a call of `encode_many` when they belong to
+    # a pool passed in, schemas are then parsed once per worker, not per call.
+    return _parse_schema(json.loads(schema_str))
+
+
+def _parse_schema(schema: AvroSchemaComponent) -> Any:
+    try:
+        import fastavro
+    except ImportError as e:
+        raise ImportError(
+            "encoding needs fastavro, install it with"
+            " `pip install pydantic2avro[fastavro]`"
+        ) from e
+
+    return fastavro.parse_schema(schema)
+
+
+def _encode_chunk(
+    parsed_schema: Any, chunk: Sequence[BaseModel | dict[str, Any]]
+) -> tuple[BytesIO, list[int]]:
+    from fastavro import schemaless_writer
+
+    fobj = BytesIO()
+    offsets = [0]
+
+    for record in chunk:
+        if isinstance(record, BaseModel):
+            record = record.model_dump()
+        schemaless_writer(fobj, parsed_schema, record)
+        offsets.append(fobj.tell())
+
+    return fobj, offsets
+
+
+def _encode_chunk_to_shared_memory(
+    schema_str: str, chunk: Sequence[BaseModel | dict[str, Any]]
+) -> tuple[str | None, list[int]]:
+    fobj, offsets = _encode_chunk(_parse_schema_str(schema_str), chunk)
+
+    if offsets[-1] == 0:
+        return None, offsets
+
+    segment = shared_memory.SharedMemory(create=True, size=offsets[-1])
+    segment.buf[:offsets[-1]] = fobj.getbuffer()
+    segment.close()
+    # the parent process unlinks the segment once it has read it, the
+    # worker's resource tracker must not do that on worker shutdown.
+    resource_tracker.unregister(segment._name, "shared_memory")  # type: ignore[attr-defined]
+
+    return segment.name, offsets
+
+
+def _map_segment(name: str) -> mmap.mmap:
+    segment = shared_memory.SharedMemory(name=name)
+    # the mapping is taken over from `segment`, so it stays valid as long
+    # as views of it are alive (and is then unmapped silently) instead of
+    # `SharedMemory.close` failing on them.
+    mapping = segment._mmap  # type: ignore[attr-defined]
+    segment._buf.release()  # type: ignore[attr-defined]
+    segment._buf = segment._mmap = None  # type: ignore[attr-defined]
+    segment.close()
+    return mapping
+
+
+class EncodedRecords(Sequence[memoryview]):
+    """
+    Avro binary encodings of records, back to back in one or more buffers
+    (one per chunk encoded by `encode_many`). Items are zero-copy
+    `memoryview`s into those buffers.
+
+    Buffers that are shared memory segments (named `segment_names`) are
+    unlinked by `close`, on leaving a `with` block, or once the object is
+    garbage collected. Their memory is unmapped then too, or, for items
+    still referenced, once the last of them is gone.
+    """
+
+    def __init__(
+        self,
+        chunks: list[tuple[Any, list[int]]],
+        segment_names: list[str] | None = None,
+    ) -> None:
+        self._buffers = [buffer for buffer, _offsets in chunks]
+        self._views = [memoryview(buffer) for buffer in self._buffers]
+        self._offsets = [offsets for _buffer, offsets in chunks]
+        # index of the first record of every chunk, and the record count.
+        self._starts = [0]
+        for offsets in self._offsets:
+            self._starts.append(self._starts[-1] + len(offsets) - 1)
+
+        self._finalizer = weakref.finalize(
+            self, _unlink_segments, list(segment_names or ())
+        )
+
+    def __len__(self) -> int:
+        return self._starts[-1]
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+
+        chunk = bisect.bisect_right(self._starts, index) - 1
+        offsets = self._offsets[chunk]
+        index -= self._starts[chunk]
+        return self._views[chunk][offsets[index]:offsets[index + 1]]
+
+    def __iter__(self) -> Iterator[memoryview]:
+        for view, offsets in zip(self._views, self._offsets):
+            for index in range(len(offsets) - 1):
+                yield view[offsets[index]:offsets[index + 1]]
+
+    def close(self) -> None:
+        self._finalizer()
+        for view in self._views:
+            view.release()
+        for buffer in self._buffers:
+            if isinstance(buffer, mmap.mmap):
+                with contextlib.suppress(BufferError):  # items still alive
+                    buffer.close()
+        self._buffers = list()
+
+    def __enter__(self) -> "EncodedRecords":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def _unlink_segments(names: list[str]) -> None:
+    for name in names:
+        try:
+            segment = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            continue
+        segment.close()
+        segment.unlink()
+
+
+def encode_many(
+    pydantic_model: Type[BaseModel],
+    records: Sequence[BaseModel | dict[str, Any]],
+    *,
+    namespace: str | None = None,
+    schema_options: SchemaOptions = SchemaOptions(),
+    processes: int | None = None,
+    chunk_size: int = 10_000,
+    executor: Executor | None = None,
+) -> EncodedRecords:
+    """
+    Avro (schemaless) binary encode `records`, instances of `pydantic_model`
+    or their `model_dump()`s, in a pool of `processes` workers, or in
+    `executor` (e.g. a `ProcessPoolExecutor`) when given. Pass the same
+    executor to every call to keep its workers, and their parsed schemas,
+    across calls. It is not shut down by `encode_many`.
+
+    Each worker parses the schema once and encodes its chunks of records
+    into shared memory segments, only the segments' names and the records'
+    offsets in them are sent back. The parent maps the segments as they are
+    and never copies the encoded bytes. A chunk's encoded size is not known
+    before encoding it, so workers encode into a local buffer and copy it
+    once into an exactly sized segment.
+
+    The output is the same, byte for byte, as encoding the records one
+    after another in a single process, which is what `processes=1` does.
+    """
+    schema = PydanticToAvroSchemaMaker(
+        pydantic_model,
+        namespace=namespace,
+        schema_options=schema_options,
+    ).get_schema()
+
+    processes = processes or os.cpu_count() or 1
+
+    if (executor is None and processes == 1) or len(records) <= chunk_size:
+        fobj, offsets = _encode_chunk(_parse_schema(schema), records)
+        return EncodedRecords([(fobj.getbuffer(), offsets)])
+
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            return _encode_in(executor, schema, records, chunk_size)
+
+    return _encode_in(executor, schema, records, chunk_size)
+
+
+def _encode_in(
+    executor: Executor,
+    schema: AvroSchemaComponent,
+    records: Sequence[BaseModel | dict[str, Any]],
+    chunk_size: int,
+) -> EncodedRecords:
+    schema_str = json.dumps(schema)
+
+    chunks = [
+        records[start:start + chunk_size]
+        for start in range(0, len(records), chunk_size)
+    ]
+
+    encoded_chunks: list[tuple[Any, list[int]]] = list()
+    segment_names: list[str] = list()
+
+    futures = [
+        executor.submit(_encode_chunk_to_shared_memory, schema_str, chunk)
+        for chunk in chunks
+    ]
+
+    for index, future in enumerate(futures):
+        try:
+            name, chunk_offsets = future.result()
+        except BaseException:
+            _discard_segments(futures[index + 1:])
+            _unlink_segments(segment_names)
+            raise
+
+        if name is None:
+            encoded_chunks.append((b"", chunk_offsets))
+            continue
+
+        segment_names.append(name)
+        encoded_chunks.append((_map_segment(name), chunk_offsets))
+
+    return EncodedRecords(encoded_chunks, segment_names)
+
+
+def _discard_segments(futures: list) -> None:
+    for future in futures:
+        future.cancel()
+        if future.cancelled() or future.exception() is not None:
+            continue
+
+        name, _chunk_offsets = future.result()
+        if name is not None:
+            segment = shared_memory.SharedMemory(name=name)
+            segment.close()
+            segment.unlink()
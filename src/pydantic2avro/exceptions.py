@@ -15,3 +15,12 @@ class InvalidEnumMemeberException(Exception):
 
 class InvalidLiteralMemeberException(Exception):
     pass
+
+class AmbiguousUnionException(Exception):
+    pass
+
+class UnresolvableUnionBranchException(Exception):
+    pass
+
+class RecordTooLargeException(Exception):
+    pass
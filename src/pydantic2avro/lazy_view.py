@@ -0,0 +1,475 @@
+import datetime
+import decimal
+import struct
+import uuid
+import weakref
+from typing import Any, Callable, ClassVar, NamedTuple, Type, get_args
+
+import pydantic
+from pydantic import BaseModel
+
+from .annotation_normalizer import is_union, normalize_annotation
+from .enums import AvroDataTypes, AvroLogicalTypes
+from .exceptions import UnsupportedTypeException
+from .schema_component_types import AvroSchemaComponent
+from .schema_maker import PydanticToAvroSchemaMaker
+from .schema_options import SchemaOptions
+
+Buffer = memoryview
+Reader = Callable[[Buffer, int], tuple[Any, int]]
+# reads a value whose encoding is known to span buffer[start:end].
+LazyReader = Callable[[Buffer, int, int], Any]
+Skipper = Callable[[Buffer, int], int]
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_EPOCH_DATE = datetime.date(1970, 1, 1)
+
+
+def read_long(buffer: Buffer, pos: int) -> tuple[int, int]:
+    byte = buffer[pos]
+    pos += 1
+    n = byte & 0x7F
+    shift = 7
+    while byte & 0x80:
+        byte = buffer[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        shift += 7
+    return (n >> 1) ^ -(n & 1), pos
+
+
+def skip_long(buffer: Buffer, pos: int) -> int:
+    while buffer[pos] & 0x80:
+        pos += 1
+    return pos + 1
+
+
+def _read_raw_bytes(buffer: Buffer, pos: int) -> tuple[Buffer, int]:
+    length, pos = read_long(buffer, pos)
+    return buffer[pos:pos + length], pos + length
+
+
+def _skip_raw_bytes(buffer: Buffer, pos: int) -> int:
+    length, pos = read_long(buffer, pos)
+    return pos + length
+
+
+def _read_string(buffer: Buffer, pos: int) -> tuple[str, int]:
+    raw, pos = _read_raw_bytes(buffer, pos)
+    return str(raw, "utf-8"), pos
+
+
+def _read_bytes(buffer: Buffer, pos: int) -> tuple[bytes, int]:
+    raw, pos = _read_raw_bytes(buffer, pos)
+    return bytes(raw), pos
+
+
+def _struct_codec(fmt: str) -> tuple[Reader, Skipper]:
+    unpack_from = struct.Struct(fmt).unpack_from
+    size = struct.calcsize(fmt)
+    return (
+        lambda buffer, pos: (unpack_from(buffer, pos)[0], pos + size),
+        lambda buffer, pos: pos + size,
+    )
+
+
+class Codec(NamedTuple):
+    # decodes to the value a pydantic field would hold.
+    read: Reader
+    # moves past the value without decoding it.
+    skip: Skipper
+    # decodes strings and bytes to memoryview slices and records to views.
+    read_lazy: LazyReader
+
+
+def _codec(read: Reader, skip: Skipper, read_lazy: LazyReader | None = None) -> Codec:
+    return Codec(read, skip, read_lazy or (lambda buffer, pos, end: read(buffer, pos)[0]))
+
+
+def _read_lazy_raw_bytes(buffer: Buffer, pos: int, end: int) -> Buffer:
+    return buffer[skip_long(buffer, pos):end]
+
+
+_PRIMITIVE_CODECS: dict[str, Codec] = {
+    AvroDataTypes.NULL.value: _codec(
+        lambda buffer, pos: (None, pos), lambda buffer, pos: pos
+    ),
+    AvroDataTypes.BOOLEAN.value: _codec(
+        lambda buffer, pos: (buffer[pos] != 0, pos + 1), lambda buffer, pos: pos + 1
+    ),
+    AvroDataTypes.INT.value: _codec(read_long, skip_long),
+    AvroDataTypes.LONG.value: _codec(read_long, skip_long),
+    AvroDataTypes.FLOAT.value: _codec(*_struct_codec("<f")),
+    AvroDataTypes.DOUBLE.value: _codec(*_struct_codec("<d")),
+    AvroDataTypes.BYTES.value: _codec(_read_bytes, _skip_raw_bytes, _read_lazy_raw_bytes),
+    AvroDataTypes.STRING.value: _codec(_read_string, _skip_raw_bytes, _read_lazy_raw_bytes),
+}
+
+
+def _converted(codec: Codec, convert: Callable[[Any], Any]) -> Codec:
+    read = codec.read
+
+    def read_converted(buffer: Buffer, pos: int) -> tuple[Any, int]:
+        value, pos = read(buffer, pos)
+        return convert(value), pos
+
+    return _codec(read_converted, codec.skip)
+
+
+def _duration_to_timedelta(value: bytes) -> datetime.timedelta:
+    # months are taken as 30 days, timedelta has no notion of months.
+    months, days, milliseconds = struct.unpack("<III", value)
+    return datetime.timedelta(days=months * 30 + days, milliseconds=milliseconds)
+
+
+def _naive_timestamp(units_per_second: int) -> Callable[[int], datetime.datetime]:
+    # inverse of fastavro's encoding of naive datetimes, taken as local time.
+    def convert(value: int) -> datetime.datetime:
+        seconds, fraction = divmod(value, units_per_second)
+        return datetime.datetime.fromtimestamp(seconds) + datetime.timedelta(
+            microseconds=fraction * 1000_000 // units_per_second
+        )
+
+    return convert
+
+
+def _logical_codec(schema: dict[str, Any], codec: Codec, type_: Any) -> Codec:
+    match schema["logicalType"]:
+        case AvroLogicalTypes.DECIMAL.value:
+            scale = schema.get("scale", 0)
+            context = decimal.Context(prec=schema["precision"])
+            return _converted(
+                codec,
+                lambda value: decimal.Decimal(
+                    int.from_bytes(value, byteorder="big", signed=True)
+                ).scaleb(-scale, context),
+            )
+
+        case AvroLogicalTypes.UUID.value:
+            return _converted(codec, uuid.UUID)
+
+        case AvroLogicalTypes.DATE.value:
+            return _converted(
+                codec, lambda value: _EPOCH_DATE + datetime.timedelta(days=value)
+            )
+
+        case AvroLogicalTypes.TIME_MILLIS.value:
+            return _converted(
+                codec,
+                lambda value: (
+                    datetime.datetime.min + datetime.timedelta(milliseconds=value)
+                ).time(),
+            )
+
+        case AvroLogicalTypes.TIME_MICROS.value:
+            return _converted(
+                codec,
+                lambda value: (
+                    datetime.datetime.min + datetime.timedelta(microseconds=value)
+                ).time(),
+            )
+
+        case AvroLogicalTypes.TIMESTAMP_MILLIS.value if type_ is pydantic.NaiveDatetime:
+            return _converted(codec, _naive_timestamp(1000))
+
+        case AvroLogicalTypes.TIMESTAMP_MICROS.value if type_ is pydantic.NaiveDatetime:
+            return _converted(codec, _naive_timestamp(1000_000))
+
+        case AvroLogicalTypes.TIMESTAMP_MILLIS.value:
+            return _converted(
+                codec, lambda value: _EPOCH + datetime.timedelta(milliseconds=value)
+            )
+
+        case AvroLogicalTypes.TIMESTAMP_MICROS.value:
+            return _converted(
+                codec, lambda value: _EPOCH + datetime.timedelta(microseconds=value)
+            )
+
+        case AvroLogicalTypes.DURATION.value:
+            return _converted(codec, _duration_to_timedelta)
+
+        case _:
+            return codec
+
+
+def _blocks_codec(read_item: Reader, skip_item: Skipper, is_map: bool) -> Codec:
+    def read(buffer: Buffer, pos: int) -> tuple[Any, int]:
+        items: Any = dict() if is_map else list()
+        count, pos = read_long(buffer, pos)
+        while count != 0:
+            if count < 0:
+                count = -count
+                pos = skip_long(buffer, pos)  # block size in bytes
+            for _ in range(count):
+                if is_map:
+                    key, pos = _read_string(buffer, pos)
+                    items[key], pos = read_item(buffer, pos)
+                else:
+                    item, pos = read_item(buffer, pos)
+                    items.append(item)
+            count, pos = read_long(buffer, pos)
+        return items, pos
+
+    def skip(buffer: Buffer, pos: int) -> int:
+        count, pos = read_long(buffer, pos)
+        while count != 0:
+            if count < 0:
+                size, pos = read_long(buffer, pos)
+                pos += size
+            else:
+                for _ in range(count):
+                    if is_map:
+                        pos = _skip_raw_bytes(buffer, pos)
+                    pos = skip_item(buffer, pos)
+            count, pos = read_long(buffer, pos)
+        return pos
+
+    return _codec(read, skip)
+
+
+class LazyRecordView:
+    """
+    Read-only view of an avro (schemaless) binary encoded record.
+
+    Nothing is decoded up front. On first field access the offsets of all
+    fields are found by skipping over them, after which only the fields
+    actually accessed are decoded. String and bytes fields are returned as
+    `memoryview` slices of the underlying buffer (use `materialize` for
+    `str`/`bytes`) and nested records as views of their own. `to_model`
+    decodes everything into an instance of the pydantic model.
+
+    Fields are read as attributes, or as `view[fieldname]`, the only way to
+    read fields named like an attribute of the view itself (e.g. `schema`
+    or `to_model`).
+
+    Subclasses, one per pydantic model, are made by `lazy_view_class`.
+    """
+
+    __slots__ = ("_buffer", "_start", "_offsets", "_cache")
+
+    pydantic_model: ClassVar[Type[BaseModel]]
+    schema: ClassVar[AvroSchemaComponent]
+    _fieldnames: ClassVar[tuple[str, ...]]
+    _codecs: ClassVar[tuple[Codec, ...]]
+
+    def __init__(self, buffer: Any, start: int = 0) -> None:
+        self._buffer = buffer if isinstance(buffer, memoryview) else memoryview(buffer)
+        self._start = start
+        self._offsets: list[int] | None = None
+        self._cache: dict[int, Any] = dict()
+
+    def _field_offsets(self) -> list[int]:
+        if self._offsets is None:
+            offsets = [self._start]
+            pos = self._start
+            for codec in self._codecs:
+                pos = codec.skip(self._buffer, pos)
+                offsets.append(pos)
+            self._offsets = offsets
+        return self._offsets
+
+    def _get(self, index: int) -> Any:
+        try:
+            return self._cache[index]
+        except KeyError:
+            offsets = self._field_offsets()
+            value = self._codecs[index].read_lazy(
+                self._buffer, offsets[index], offsets[index + 1]
+            )
+            self._cache[index] = value
+            return value
+
+    def __getitem__(self, fieldname: str) -> Any:
+        try:
+            index = self._fieldnames.index(fieldname)
+        except ValueError:
+            raise KeyError(fieldname) from None
+        return self._get(index)
+
+    @property
+    def encoded_size(self) -> int:
+        offsets = self._field_offsets()
+        return offsets[-1] - offsets[0]
+
+    def materialize(self, fieldname: str) -> Any:
+        index = self._fieldnames.index(fieldname)
+        value, _pos = self._codecs[index].read(
+            self._buffer, self._field_offsets()[index]
+        )
+        return value
+
+    def to_model(self) -> BaseModel:
+        return self._read_model(self._buffer, self._start)[0]
+
+    @classmethod
+    def _read_model(cls, buffer: Buffer, pos: int) -> tuple[BaseModel, int]:
+        values = dict()
+        for fieldname, codec in zip(cls._fieldnames, cls._codecs):
+            values[fieldname], pos = codec.read(buffer, pos)
+        return cls.pydantic_model.model_validate(values), pos
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(encoded_size={self.encoded_size})"
+
+
+def _field_property(index: int) -> property:
+    return property(lambda self: self._get(index))
+
+
+_VIEW_ATTRIBUTES = frozenset(dir(LazyRecordView))
+
+
+class _LazyViewCompiler:
+    def __init__(self) -> None:
+        self.named: dict[str, Codec] = dict()
+
+    def compile(self, type_: Any, schema: AvroSchemaComponent) -> Codec:
+        if isinstance(schema, str):
+            if schema in _PRIMITIVE_CODECS:
+                return _PRIMITIVE_CODECS[schema]
+            # named type compiled earlier, looked up lazily since it may
+            # still be in the middle of being compiled (recursive records).
+            named = self.named
+            return _codec(
+                lambda buffer, pos: named[schema].read(buffer, pos),
+                lambda buffer, pos: named[schema].skip(buffer, pos),
+                lambda buffer, pos, end: named[schema].read_lazy(buffer, pos, end),
+            )
+
+        if isinstance(schema, list):
+            return self.compile_union(type_, schema)
+
+        if "logicalType" in schema:
+            return _logical_codec(schema, self.compile(type_, schema["type"]), type_)
+
+        match schema["type"]:
+            case AvroDataTypes.ARRAY.value:
+                items = self.compile(get_args(type_)[0], schema["items"])
+                return _blocks_codec(items.read, items.skip, is_map=False)
+
+            case AvroDataTypes.MAP.value:
+                values = self.compile(get_args(type_)[1], schema["values"])
+                return _blocks_codec(values.read, values.skip, is_map=True)
+
+            case AvroDataTypes.ENUM.value:
+                symbols = schema["symbols"]
+                codec = self.named[schema["name"]] = _converted(
+                    _PRIMITIVE_CODECS[AvroDataTypes.LONG.value],
+                    lambda index: symbols[index],
+                )
+                return codec
+
+            case AvroDataTypes.FIXED.value:
+                size = schema["size"]
+                codec = self.named[schema["name"]] = _codec(
+                    lambda buffer, pos: (bytes(buffer[pos:pos + size]), pos + size),
+                    lambda buffer, pos: pos + size,
+                    lambda buffer, pos, end: buffer[pos:end],
+                )
+                return codec
+
+            case AvroDataTypes.RECORD.value:
+                return self.compile_record(type_, schema)[1]
+
+            case AvroDataTypes.STRING.value:
+                # pydantic networks fields
+                return _PRIMITIVE_CODECS[AvroDataTypes.STRING.value]
+
+            case _:
+                raise UnsupportedTypeException(f"{schema} is unsupported")
+
+    def compile_union(self, type_: Any, schema: list) -> Codec:
+        if not is_union(type_):
+            raise UnsupportedTypeException(f"{type_} is not an union")
+
+        branches = [
+            self.compile(member_type, member_schema)
+            for member_type, member_schema in zip(get_args(type_), schema)
+        ]
+
+        def read(buffer: Buffer, pos: int) -> tuple[Any, int]:
+            index, pos = read_long(buffer, pos)
+            return branches[index].read(buffer, pos)
+
+        def skip(buffer: Buffer, pos: int) -> int:
+            index, pos = read_long(buffer, pos)
+            return branches[index].skip(buffer, pos)
+
+        def read_lazy(buffer: Buffer, pos: int, end: int) -> Any:
+            index, pos = read_long(buffer, pos)
+            return branches[index].read_lazy(buffer, pos, end)
+
+        return _codec(read, skip, read_lazy)
+
+    def compile_record(
+        self, type_: Type[BaseModel], schema: dict
+    ) -> tuple[Type[LazyRecordView], Codec]:
+        namespace: dict[str, Any] = dict(
+            __slots__=(),
+            pydantic_model=type_,
+            schema=schema,
+            _fieldnames=tuple(field["name"] for field in schema["fields"]),
+        )
+        for index, fieldname in enumerate(namespace["_fieldnames"]):
+            # fields must not hide the view's own attributes.
+            if fieldname not in _VIEW_ATTRIBUTES:
+                namespace[fieldname] = _field_property(index)
+
+        view_class: Type[LazyRecordView] = type(
+            f"{type_.__name__}View", (LazyRecordView,), namespace
+        )
+
+        field_codecs: list[Codec] = list()
+
+        def skip(buffer: Buffer, pos: int) -> int:
+            for codec in field_codecs:
+                pos = codec.skip(buffer, pos)
+            return pos
+
+        def read_lazy(buffer: Buffer, pos: int, end: int) -> LazyRecordView:
+            return view_class(buffer, pos)
+
+        codec = self.named[schema["name"]] = _codec(
+            view_class._read_model, skip, read_lazy
+        )
+
+        for field, fieldinfo in zip(schema["fields"], type_.model_fields.values()):
+            fieldtype = normalize_annotation(fieldinfo.annotation, owner=type_)
+            field_codecs.append(self.compile(fieldtype, field["type"]))
+        view_class._codecs = tuple(field_codecs)
+
+        return view_class, codec
+
+
+# shared while in use, like union branch indexes, so neither the view
+# classes nor the models in the keys are kept alive by the cache alone.
+_view_classes: "weakref.WeakValueDictionary[tuple[Type[BaseModel], str | None, str], Type[LazyRecordView]]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def lazy_view_class(
+    pydantic_model: Type[BaseModel],
+    *,
+    namespace: str | None = None,
+    schema_options: SchemaOptions = SchemaOptions(),
+) -> Type[LazyRecordView]:
+    """
+    `LazyRecordView` subclass for records of `pydantic_model` encoded with
+    the schema `PydanticToAvroSchemaMaker` makes for it. Made once per model
+    and options, then cached.
+    """
+    key = (pydantic_model, namespace, schema_options.model_dump_json())
+
+    view_class = _view_classes.get(key)
+    if view_class is None:
+        schema = PydanticToAvroSchemaMaker(
+            pydantic_model,
+            namespace=namespace,
+            schema_options=schema_options,
+        ).get_schema()
+        view_class = _view_classes[key] = _LazyViewCompiler().compile_record(
+            pydantic_model, schema
+        )[0]
+
+    return view_class
@@ -0,0 +1,377 @@
+import contextlib
+import importlib.util
+import json
+import keyword
+import os
+import re
+import sys
+import tempfile
+import types
+from typing import Any
+
+import pydantic.networks
+
+from .enums import (MAP_AVRO_LOGICAL_TYPE_TO_AVRO_DATA_TYPE, AvroDataTypes,
+                    AvroLogicalTypes)
+from .exceptions import UnsupportedTypeException
+from .schema_artifacts import schema_fingerprint
+from .schema_component_types import AvroSchemaComponent
+
+# bump whenever the generated source changes, stale cached modules are
+# then regenerated instead of imported.
+MODEL_MAKER_VERSION = 2
+
+_PRIMITIVE_TYPES = {
+    AvroDataTypes.NULL.value: "None",
+    AvroDataTypes.BOOLEAN.value: "bool",
+    AvroDataTypes.INT.value: "int",
+    AvroDataTypes.LONG.value: "int",
+    AvroDataTypes.FLOAT.value: "float",
+    AvroDataTypes.DOUBLE.value: "float",
+    AvroDataTypes.BYTES.value: "bytes",
+    AvroDataTypes.STRING.value: "str",
+}
+
+_LOGICAL_TYPES = {
+    AvroLogicalTypes.UUID: "_uuid.UUID",
+    AvroLogicalTypes.DATE: "_datetime.date",
+    AvroLogicalTypes.TIME_MILLIS: "_datetime.time",
+    AvroLogicalTypes.TIME_MICROS: "_datetime.time",
+    AvroLogicalTypes.TIMESTAMP_MILLIS: "_datetime.datetime",
+    AvroLogicalTypes.TIMESTAMP_MICROS: "_datetime.datetime",
+    AvroLogicalTypes.DURATION: "_datetime.timedelta",
+}
+
+# modules are imported under private names, fields named e.g. `uuid` would
+# otherwise shadow them in the annotations of their class.
+_HEADER = """\
+# generated by pydantic2avro from an avro schema, do not edit.
+from __future__ import annotations
+
+import datetime as _datetime
+import decimal as _decimal
+import enum as _enum
+import typing as _typing
+import uuid as _uuid
+
+import pydantic as _pydantic
+
+"""
+
+
+# names the generated module defines itself, classes must not shadow them.
+_MODULE_NAMES = frozenset((
+    "_datetime", "_decimal", "_enum", "_typing", "_uuid", "_pydantic",
+    "_model", "SCHEMA_FINGERPRINT", "ROOT_MODEL",
+))
+
+_AVRO_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def _checked_name(name: Any, kind: str) -> str:
+    # names end up in the generated source, which is then imported, so
+    # anything but a valid avro name (always a valid python identifier)
+    # is rejected before any source is written.
+    if not isinstance(name, str) or not _AVRO_NAME.fullmatch(name):
+        raise UnsupportedTypeException(f"invalid avro {kind} name {name!r}")
+    return name
+
+
+def _checked_int(schema: dict[str, Any], attribute: str, default: int | None = None) -> int:
+    value = schema.get(attribute, default)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise UnsupportedTypeException(f"invalid {attribute} {value!r} in {schema}")
+    return value
+
+
+def _unique(name: str, taken: set[str]) -> str:
+    while name in taken:
+        name = f"{name}_"
+    taken.add(name)
+    return name
+
+
+def _python_name(name: str) -> str:
+    if keyword.iskeyword(name):
+        return f"{name}_"
+    if name.startswith("_"):
+        return f"field{name}"
+    return name
+
+
+class AvroToPydanticModelMaker:
+    """
+    Generates the source of a python module with pydantic models (and str
+    Enums) for the record (and enum) types of an avro `schema`, the inverse
+    of `PydanticToAvroSchemaMaker`.
+    """
+
+    def __init__(self, schema: AvroSchemaComponent | str) -> None:
+        if isinstance(schema, str):
+            schema = json.loads(schema)
+
+        if not isinstance(schema, dict) or schema.get("type") != AvroDataTypes.RECORD.value:
+            raise UnsupportedTypeException("root of the schema must be a record")
+
+        self.schema = schema
+        # type expressions of the named types, by full name.
+        self._named_types: dict[str, str] = dict()
+        self._class_names: set[str] = set()
+        self._record_class_names: list[str] = list()
+        self._enums: list[str] = list()
+        self._records: list[str] = list()
+
+        self.root_class_name = self.__type_expression(schema, namespace=None)
+
+    @classmethod
+    def from_avsc(cls, path: str | os.PathLike) -> "AvroToPydanticModelMaker":
+        with open(path) as fobj:
+            return cls(json.load(fobj))
+
+    def get_source(self) -> str:
+        return "".join((
+            _HEADER,
+            f"SCHEMA_FINGERPRINT = {schema_fingerprint(self.schema)!r}\n\n\n",
+            *self._enums,
+            *self._records,
+            f"for _model in ({', '.join(self._record_class_names)},):\n",
+            "    _model.model_rebuild()\n\n",
+            f"ROOT_MODEL = {self.root_class_name}\n",
+        ))
+
+    def __fullname(self, schema: dict[str, Any], namespace: str | None) -> str:
+        name = schema["name"]
+        if not isinstance(name, str) or "." not in name:
+            namespace = schema.get("namespace", namespace)
+            if namespace:
+                if not isinstance(namespace, str):
+                    raise UnsupportedTypeException(f"invalid avro namespace {namespace!r}")
+                name = f"{namespace}.{name}"
+
+        for part in name.split(".") if isinstance(name, str) else (name,):
+            _checked_name(part, "type")
+        return name
+
+    def __declare_class(self, fullname: str) -> str:
+        # capitalized, enums made from `Literal`s are named after their field
+        # and must not be shadowed by it in the class body.
+        short_name = fullname.rsplit(".", 1)[-1]
+        class_name = short_name[:1].upper() + short_name[1:]
+        if class_name in self._class_names or class_name in _MODULE_NAMES:
+            class_name = fullname.replace(".", "_")
+        class_name = _unique(class_name, self._class_names | _MODULE_NAMES)
+        self._class_names.add(class_name)
+        self._named_types[fullname] = class_name
+        return class_name
+
+    def __named_type(self, name: str, namespace: str | None) -> str:
+        for fullname in (f"{namespace}.{name}" if namespace else name, name):
+            if fullname in self._named_types:
+                return self._named_types[fullname]
+        raise UnsupportedTypeException(f"unknown named type {name!r}")
+
+    def __type_expression(self, schema: AvroSchemaComponent, namespace: str | None) -> str:
+        if isinstance(schema, str):
+            if schema in _PRIMITIVE_TYPES:
+                return _PRIMITIVE_TYPES[schema]
+            return self.__named_type(schema, namespace)
+
+        if isinstance(schema, list):
+            return " | ".join(
+                self.__type_expression(member, namespace) for member in schema
+            )
+
+        type_ = schema["type"]
+        if not isinstance(type_, str):
+            return self.__type_expression(type_, namespace)
+
+        logical_type = self.__logical_type_expression(schema)
+        if logical_type is not None:
+            if type_ == AvroDataTypes.FIXED.value and "name" in schema:
+                self._named_types[self.__fullname(schema, namespace)] = logical_type
+            return logical_type
+
+        match type_:
+            case AvroDataTypes.ARRAY.value:
+                return f"list[{self.__type_expression(schema['items'], namespace)}]"
+
+            case AvroDataTypes.MAP.value:
+                return f"dict[str, {self.__type_expression(schema['values'], namespace)}]"
+
+            case AvroDataTypes.FIXED.value:
+                size = _checked_int(schema, "size")
+                expression = self._named_types[self.__fullname(schema, namespace)] = (
+                    f"_typing.Annotated[bytes, _pydantic.Field("
+                    f"min_length={size}, max_length={size})]"
+                )
+                return expression
+
+            case AvroDataTypes.ENUM.value:
+                return self.__make_enum(schema, namespace)
+
+            case AvroDataTypes.RECORD.value:
+                return self.__make_record(schema, namespace)
+
+            case AvroDataTypes.STRING.value if schema.get("__pydantic_class") in pydantic.networks.__all__:
+                return f"_pydantic.{schema['__pydantic_class']}"
+
+            case _ if type_ in _PRIMITIVE_TYPES:
+                return _PRIMITIVE_TYPES[type_]
+
+            case _:
+                return self.__named_type(type_, namespace)
+
+    def __logical_type_expression(self, schema: dict[str, Any]) -> str | None:
+        try:
+            logical_type = AvroLogicalTypes(schema.get("logicalType"))
+        except ValueError:
+            return None
+
+        if logical_type is AvroLogicalTypes.DECIMAL:
+            if schema["type"] not in (AvroDataTypes.BYTES.value, AvroDataTypes.FIXED.value):
+                return None
+            return (
+                f"_typing.Annotated[_decimal.Decimal, _pydantic.Field("
+                f"max_digits={_checked_int(schema, 'precision')}, "
+                f"decimal_places={_checked_int(schema, 'scale', 0)})]"
+            )
+
+        # logical types on the wrong underlying type are ignored, as the
+        # avro specification asks.
+        if MAP_AVRO_LOGICAL_TYPE_TO_AVRO_DATA_TYPE[logical_type].value != schema["type"]:
+            return None
+
+        return _LOGICAL_TYPES[logical_type]
+
+    def __make_enum(self, schema: dict[str, Any], namespace: str | None) -> str:
+        class_name = self.__declare_class(self.__fullname(schema, namespace))
+
+        lines = [f"class {class_name}(str, _enum.Enum):\n"]
+        member_names: set[str] = set()
+        for symbol in schema["symbols"]:
+            member_name = _unique(
+                _python_name(_checked_name(symbol, "enum symbol")), member_names
+            )
+            lines.append(f"    {member_name} = {symbol!r}\n")
+        lines.append("\n\n")
+
+        self._enums.append("".join(lines))
+        return class_name
+
+    def __make_record(self, schema: dict[str, Any], namespace: str | None) -> str:
+        fullname = self.__fullname(schema, namespace)
+        class_name = self.__declare_class(fullname)
+        self._record_class_names.append(class_name)
+        namespace = fullname.rsplit(".", 1)[0] if "." in fullname else None
+
+        lines = [f"class {class_name}(_pydantic.BaseModel):\n"]
+        aliased = False
+        python_names: set[str] = set()
+
+        for field in schema["fields"]:
+            name = _checked_name(field["name"], "field")
+            python_name = _unique(_python_name(name), python_names)
+            field_type = self.__type_expression(field["type"], namespace)
+
+            field_args = list()
+            if python_name != name:
+                aliased = True
+                field_args.append(f"alias={name!r}")
+            if "default" in field and not self.__has_logical_type(field["type"]):
+                default = self.__default_value(field["type"], field["default"])
+                if isinstance(default, (list, dict)):
+                    field_args.append(f"default_factory=lambda: {default!r}")
+                else:
+                    field_args.append(f"default={default!r}")
+                field_args.append("validate_default=True")
+
+            if field_args:
+                lines.append(
+                    f"    {python_name}: {field_type} = "
+                    f"_pydantic.Field({', '.join(field_args)})\n"
+                )
+            else:
+                lines.append(f"    {python_name}: {field_type}\n")
+
+        if aliased:
+            lines.append("\n    model_config = _pydantic.ConfigDict(populate_by_name=True)\n")
+        if not schema["fields"]:
+            lines.append("    pass\n")
+        lines.append("\n\n")
+
+        self._records.append("".join(lines))
+        return class_name
+
+    @staticmethod
+    def __first_branch(schema: AvroSchemaComponent) -> AvroSchemaComponent:
+        # defaults of union fields are for the union's first branch.
+        if isinstance(schema, list):
+            schema = schema[0]
+        if isinstance(schema, dict) and not isinstance(schema["type"], str):
+            return AvroToPydanticModelMaker.__first_branch(schema["type"])
+        return schema
+
+    def __has_logical_type(self, schema: AvroSchemaComponent) -> bool:
+        schema = self.__first_branch(schema)
+        return isinstance(schema, dict) and "logicalType" in schema
+
+    def __default_value(self, schema: AvroSchemaComponent, default: Any) -> Any:
+        schema = self.__first_branch(schema)
+        type_ = schema["type"] if isinstance(schema, dict) else schema
+
+        # avro writes defaults of bytes and fixed as strings of code points.
+        if type_ in (AvroDataTypes.BYTES.value, AvroDataTypes.FIXED.value) and isinstance(default, str):
+            return default.encode("latin-1")
+        return default
+
+
+def load_pydantic_models(
+    schema: AvroSchemaComponent | str,
+    cache_dir: str | os.PathLike,
+) -> types.ModuleType:
+    """
+    Module with the pydantic models for `schema`, made by
+    `AvroToPydanticModelMaker`. Generated modules are cached in `cache_dir`
+    by schema fingerprint, so later calls (in this or other processes) for
+    the same schema only import an already compiled module.
+    """
+    if isinstance(schema, str):
+        schema = json.loads(schema)
+
+    fingerprint = schema_fingerprint(schema)
+    module_name = f"pydantic2avro_models_v{MODEL_MAKER_VERSION}_{fingerprint[:32]}"
+
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    path = os.path.join(cache_dir, f"{module_name}.py")
+
+    if not os.path.exists(path):
+        source = AvroToPydanticModelMaker(schema).get_source()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        # written to a temporary file first so concurrent startups never
+        # import a partially written module.
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as fobj:
+            fobj.write(source)
+        # mkstemp makes files only their owner can read.
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"can not import generated models from {path}")
+
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        # regenerated on the next call instead of failing forever.
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+        raise
+
+    return module
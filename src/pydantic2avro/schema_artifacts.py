@@ -0,0 +1,338 @@
+import dataclasses
+import decimal
+import hashlib
+import inspect
+import json
+import marshal
+import os
+import sys
+from enum import Enum
+from typing import Any, Iterable, NamedTuple, Type, get_args, get_origin
+
+from pydantic import BaseModel
+
+from .exceptions import NotAPydanticModelException
+from .schema_component_types import AvroSchemaComponent
+from .schema_maker import PydanticToAvroSchemaMaker
+from .schema_options import SchemaOptions
+from .version import __version__
+
+ARTIFACT_FORMAT_VERSION = 2
+
+# digests of the source files of modules, by module name. Read once per
+# process and only for modules artifacts are checked against.
+_source_digests: dict[str, str | None] = dict()
+
+
+class CompiledSchema(NamedTuple):
+    schema: AvroSchemaComponent
+    fingerprint: str
+    named_types: dict[str, str]
+
+
+def schema_fingerprint(schema: AvroSchemaComponent) -> str:
+    return hashlib.sha256(
+        json.dumps(schema, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def _qualified_name(obj: Any) -> str:
+    return f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', obj)}"
+
+
+def _describe_value(value: Any, seen: set[Any]) -> str:
+    # no reprs of arbitrary objects here, they often hold memory addresses
+    # (e.g. `<function f at 0x7f...>` of validators) that differ in every
+    # process and would make every artifact look stale.
+    if value is None or isinstance(value, (bool, int, float, str, bytes, decimal.Decimal)):
+        return repr(value)
+
+    if inspect.isclass(value) or get_origin(value) is not None:
+        return _describe(value, seen)
+
+    if getattr(value, "__module__", None) == "typing":  # e.g. `Literal`
+        return repr(value)
+
+    if callable(value) and hasattr(value, "__qualname__"):
+        return _qualified_name(value)
+
+    if isinstance(value, (list, tuple)):
+        return f"[{','.join(_describe_value(item, seen) for item in value)}]"
+
+    if isinstance(value, (set, frozenset)):
+        return f"{{{','.join(sorted(_describe_value(item, seen) for item in value))}}}"
+
+    if isinstance(value, dict):
+        items = sorted(
+            f"{_describe_value(key, seen)}:{_describe_value(item, seen)}"
+            for key, item in value.items()
+        )
+        return f"{{{','.join(items)}}}"
+
+    if dataclasses.is_dataclass(value):
+        attributes = {
+            field.name: getattr(value, field.name)
+            for field in dataclasses.fields(value)
+        }
+    elif hasattr(value, "__dict__"):
+        attributes = vars(value)
+    else:
+        attributes = {
+            name: getattr(value, name)
+            for cls in type(value).__mro__
+            for name in getattr(cls, "__slots__", ())
+            if hasattr(value, name)
+        }
+
+    return f"{_qualified_name(type(value))}({_describe_value(attributes, seen)})"
+
+
+def _describe(type_: Any, seen: set[Any]) -> str:
+    if inspect.isclass(type_) and issubclass(type_, (BaseModel, Enum)):
+        name = _qualified_name(type_)
+        if type_ in seen:
+            return name
+        seen.add(type_)
+
+        if issubclass(type_, Enum):
+            return f"{name}{[member.value for member in iter(type_)]}"
+
+        fields = [
+            f"{fieldname}:{_describe(fieldinfo.annotation, seen)}"
+            f"{_describe_value(fieldinfo.metadata, seen)}"
+            for fieldname, fieldinfo in type_.model_fields.items()
+        ]
+        return f"{name}({','.join(fields)})"
+
+    origin = get_origin(type_)
+    if origin is not None:
+        args = ",".join(_describe_value(arg, seen) for arg in get_args(type_))
+        return f"{_describe_value(origin, seen)}[{args}]"
+
+    if inspect.isclass(type_):
+        return _qualified_name(type_)
+
+    return _describe_value(type_, seen)
+
+
+def _source_path(module_name: str) -> str | None:
+    path = getattr(sys.modules.get(module_name), "__file__", None)
+    return path if path is not None and os.path.exists(path) else None
+
+
+def source_digest(module_name: str) -> str | None:
+    """
+    Hash of the source file of module `module_name`, None when it has none
+    (e.g. modules made at runtime).
+    """
+    if module_name not in _source_digests:
+        path = _source_path(module_name)
+        digest = None
+        if path is not None:
+            with open(path, "rb") as fobj:
+                digest = hashlib.blake2b(fobj.read(), digest_size=16).hexdigest()
+        _source_digests[module_name] = digest
+    return _source_digests[module_name]
+
+
+def _source_stamps_of(types_: Iterable[type]) -> dict[str, list] | None:
+    # None when a type is not defined at the top level of a module with a
+    # source file, its structure can then not be told from the source.
+    stamps = dict()
+    for type_ in types_:
+        path = _source_path(type_.__module__)
+        if path is None or "<locals>" in type_.__qualname__:
+            return None
+        stat = os.stat(path)
+        stamps[type_.__module__] = [
+            stat.st_mtime_ns, stat.st_size, source_digest(type_.__module__)
+        ]
+    return stamps
+
+
+def _source_is_unchanged(module_name: str, stamp: list) -> bool:
+    # like the interpreter's check of `.pyc` files, a stat is enough while
+    # the file keeps its size and modification time. Otherwise (e.g. in
+    # another checkout) its content decides.
+    mtime_ns, size, digest = stamp
+    path = _source_path(module_name)
+    if path is None:
+        return False
+
+    stat = os.stat(path)
+    if (stat.st_mtime_ns, stat.st_size) == (mtime_ns, size):
+        return True
+    return source_digest(module_name) == digest
+
+
+def structure_fingerprint(pydantic_model: Type[BaseModel]) -> str:
+    """
+    Hash of everything schema generation reads from `pydantic_model`, i.e.
+    its fields' names, annotations and metadata plus those of every nested
+    model and enum. Cheap to compute compared to building the schema.
+    """
+    return hashlib.sha256(_describe(pydantic_model, set()).encode()).hexdigest()
+
+
+def _options_key(options: BaseModel) -> str:
+    # much cheaper than `model_dump_json` in a freshly started process.
+    return ",".join(
+        f"{name}={_options_key(value) if isinstance(value, BaseModel) else value!r}"
+        for name, value in vars(options).items()
+    )
+
+
+def _artifact_key(
+    pydantic_model: Type[BaseModel],
+    namespace: str | None,
+    schema_options: SchemaOptions,
+) -> str:
+    return "|".join((
+        f"{pydantic_model.__module__}.{pydantic_model.__qualname__}",
+        namespace or "",
+        _options_key(schema_options),
+    ))
+
+
+def _compile(
+    pydantic_model: Type[BaseModel],
+    namespace: str | None,
+    schema_options: SchemaOptions,
+) -> dict[str, Any]:
+    if not issubclass(pydantic_model, BaseModel):
+        raise NotAPydanticModelException
+
+    maker = PydanticToAvroSchemaMaker(
+        pydantic_model,
+        namespace=namespace,
+        schema_options=schema_options,
+    )
+    schema = json.loads(maker.get_schema_str())
+    sources = _source_stamps_of(maker.dp)
+
+    return dict(
+        sources=sources,
+        # only needed, and only checked, when the sources can not tell.
+        structure=structure_fingerprint(pydantic_model) if sources is None else None,
+        schema=schema,
+        fingerprint=schema_fingerprint(schema),
+        named_types={
+            fullname: f"{type_.__module__}.{type_.__qualname__}"
+            for type_, fullname in maker.dp.items()
+        },
+    )
+
+
+def compile_schema_artifacts(
+    path: str | os.PathLike,
+    pydantic_models: Iterable[Type[BaseModel]],
+    *,
+    namespace: str | None = None,
+    schema_options: SchemaOptions = SchemaOptions(),
+) -> None:
+    """
+    Write schemas, fingerprints and named type tables of `pydantic_models`
+    to a marshal file at `path`, to be read back with `SchemaArtifacts.load`.
+    """
+    artifacts = {
+        _artifact_key(pydantic_model, namespace, schema_options): _compile(
+            pydantic_model, namespace, schema_options
+        )
+        for pydantic_model in pydantic_models
+    }
+
+    with open(path, "wb") as fobj:
+        marshal.dump(
+            dict(
+                format_version=ARTIFACT_FORMAT_VERSION,
+                package_version=__version__,
+                artifacts=artifacts,
+            ),
+            fobj,
+        )
+
+
+def _is_fresh(artifact: dict[str, Any], pydantic_model: Type[BaseModel]) -> bool:
+    if artifact["sources"] is None:
+        return artifact["structure"] == structure_fingerprint(pydantic_model)
+
+    return all(
+        _source_is_unchanged(module_name, stamp)
+        for module_name, stamp in artifact["sources"].items()
+    )
+
+
+class SchemaArtifacts:
+    """
+    Schemas precompiled by `compile_schema_artifacts`.
+
+    An artifact is only used if it was compiled by this version of
+    pydantic2avro and the live model still has the structure it was
+    compiled from, otherwise (or when there is none) the schema is built
+    with `PydanticToAvroSchemaMaker` as usual.
+
+    The structure is taken to be unchanged when the source files of the
+    modules defining the model and its nested models and enums are, which
+    costs a stat (or a read when the file was touched) per module instead
+    of walking the model's fields.
+    Models defined in functions or at runtime are compared field by field
+    with `structure_fingerprint`. Changes made elsewhere, e.g. to a type
+    alias imported from another module, are not noticed, so recompile the
+    artifacts along with every deploy.
+    """
+
+    def __init__(self, artifacts: dict[str, dict[str, Any]] | None = None) -> None:
+        self._artifacts = artifacts or dict()
+        self._verified: dict[str, CompiledSchema] = dict()
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "SchemaArtifacts":
+        try:
+            with open(path, "rb") as fobj:
+                data = marshal.loads(fobj.read())
+        except (FileNotFoundError, EOFError, ValueError, TypeError):
+            return cls()
+
+        if (
+            not isinstance(data, dict)
+            or data.get("format_version") != ARTIFACT_FORMAT_VERSION
+            or data.get("package_version") != __version__
+        ):
+            return cls()
+
+        return cls(data["artifacts"])
+
+    def get(
+        self,
+        pydantic_model: Type[BaseModel],
+        *,
+        namespace: str | None = None,
+        schema_options: SchemaOptions = SchemaOptions(),
+    ) -> CompiledSchema:
+        key = _artifact_key(pydantic_model, namespace, schema_options)
+
+        if key not in self._verified:
+            artifact = self._artifacts.get(key)
+            if artifact is None or not _is_fresh(artifact, pydantic_model):
+                artifact = _compile(pydantic_model, namespace, schema_options)
+
+            self._verified[key] = CompiledSchema(
+                schema=artifact["schema"],
+                fingerprint=artifact["fingerprint"],
+                named_types=artifact["named_types"],
+            )
+
+        return self._verified[key]
+
+    def get_schema(
+        self,
+        pydantic_model: Type[BaseModel],
+        *,
+        namespace: str | None = None,
+        schema_options: SchemaOptions = SchemaOptions(),
+    ) -> AvroSchemaComponent:
+        return self.get(
+            pydantic_model,
+            namespace=namespace,
+            schema_options=schema_options,
+        ).schema
@@ -3,17 +3,20 @@ import datetime
 import decimal
 import inspect
 import json
+import math
 import types
 import typing
 import uuid
 from enum import Enum
 from functools import partial
-from typing import Type, get_args, get_origin
+from typing import Any, Type, get_args, get_origin
 
+import annotated_types
 import pydantic
 from pydantic import BaseModel
 import pydantic.networks
 
+from .annotation_normalizer import normalize_annotation
 from .enums import (MAP_AVRO_LOGICAL_TYPE_TO_AVRO_DATA_TYPE, AvroDataTypes,
                     AvroLogicalTypes, TimePrecision)
 from .exceptions import (InvalidEnumMemeberException,
@@ -22,7 +25,9 @@ from .exceptions import (InvalidEnumMemeberException,
                          NotAnAvroPrimitiveDataTypeException,
                          NotAPydanticModelException, UnsupportedTypeException)
 from .schema_component_types import AvroSchemaComponent
-from .schema_options import SchemaOptions
+from .schema_options import DecimalOptions, SchemaOptions
+from .union_index import (UnionBranchIndex, annotation_key, check_avro_union,
+                          get_union_branch_index)
 
 
 def get_avro_equivalent_type_for(
@@ -31,6 +36,7 @@ def get_avro_equivalent_type_for(
     fieldname: str | None,
     schema_options: SchemaOptions,
     dp: dict[Type[Enum] | Type[BaseModel], str],
+    union_indexes: dict[Any, UnionBranchIndex] | None = None,
 ) -> str | AvroSchemaComponent:
     if AvroTypeExpert.has_avro_primitive_type_equivalent_for(type_):
         return AvroTypeExpert.get_avro_primitive_type_equivalent_for(type_).value
@@ -50,11 +56,35 @@ def get_avro_equivalent_type_for(
             namespace=namespace,
             fieldname=fieldname,
             schema_options=schema_options,
-            dp=dp
+            dp=dp,
+            union_indexes=union_indexes,
         )
 
 
+def collect_constraints(metadata: list[Any]) -> dict[str, Any]:
+    constraints: dict[str, Any] = dict()
+
+    for item in metadata:
+        if isinstance(item, annotated_types.GroupedMetadata):
+            constraints.update(collect_constraints(list(item)))
+            continue
+
+        for name in (
+            "gt", "ge", "lt", "le",
+            "min_length", "max_length",
+            "max_digits", "decimal_places",
+        ):
+            value = getattr(item, name, None)
+            if value is not None:
+                constraints[name] = value
+
+    return constraints
+
+
 class AvroTypeExpert:
+    INT_MIN = -(2 ** 31)
+    INT_MAX = 2 ** 31 - 1
+
     @staticmethod
     def has_avro_primitive_type_equivalent_for(type_: type) -> bool:
         return type_ in (types.NoneType, bool, int, float, bytes, str)
@@ -154,6 +184,68 @@ class AvroTypeExpert:
             **other_fields,
         )
     
+    @staticmethod
+    def get_size_optimized_avro_type_equivalent_for(
+        type_: type,
+        constraints: dict[str, Any],
+        record_name: str,
+        fieldname: str,
+        schema_options: SchemaOptions,
+    ) -> AvroSchemaComponent | None:
+        """
+        Narrowest avro type that can hold every value `constraints` allow for
+        `type_`, or None if they do not allow anything narrower than the
+        default mapping. `float` is never narrowed, no constraint makes a
+        python float representable in 32 bits without loss.
+
+        Named types made here are named after the field within the record
+        (`record_name`) so fields of the same name in other records of the
+        schema do not redefine them.
+        """
+
+        match type_:
+            case builtins.int:
+                if "ge" in constraints:
+                    lower = math.ceil(constraints["ge"])
+                elif "gt" in constraints:
+                    lower = math.floor(constraints["gt"]) + 1
+                else:
+                    return None
+
+                if "le" in constraints:
+                    upper = math.floor(constraints["le"])
+                elif "lt" in constraints:
+                    upper = math.ceil(constraints["lt"]) - 1
+                else:
+                    return None
+
+                if AvroTypeExpert.INT_MIN <= lower and upper <= AvroTypeExpert.INT_MAX:
+                    return AvroDataTypes.INT.value
+
+            case builtins.bytes:
+                size = constraints.get("max_length")
+                if size is not None and constraints.get("min_length") == size:
+                    return dict(
+                        name=f"{record_name}.{fieldname}",
+                        type=AvroDataTypes.FIXED.value,
+                        size=size,
+                    )
+
+            case decimal.Decimal:
+                precision = constraints.get("max_digits")
+                scale = constraints.get("decimal_places")
+                if precision is not None and scale is not None and scale <= precision:
+                    return AvroTypeExpert.get_avro_logical_type_equivalent_for(
+                        type_,
+                        schema_options=schema_options.model_copy(
+                            update=dict(
+                                decimal=DecimalOptions(precision=precision, scale=scale)
+                            )
+                        ),
+                    )
+
+        return None
+
     @staticmethod
     def get_avro_equivaluent_for_pydantic_networks_field(type_: type):
         return dict(
@@ -168,6 +260,7 @@ class AvroTypeExpert:
         fieldname: str | None,
         schema_options: SchemaOptions,
         dp: dict[Type[Enum] | Type[BaseModel], str],
+        union_indexes: dict[Any, UnionBranchIndex] | None = None,
     ) -> AvroSchemaComponent:
 
         if type_ in dp:
@@ -196,6 +289,7 @@ class AvroTypeExpert:
                     pydantic_model=type_,
                     schema_options=schema_options,
                     dp=dp,
+                    union_indexes=union_indexes,
                 ).get_schema()
 
         partial_get_avro_equivalent_type_for = partial(
@@ -204,6 +298,7 @@ class AvroTypeExpert:
             fieldname=fieldname,
             schema_options=schema_options,
             dp=dp,
+            union_indexes=union_indexes,
         )
 
         match get_origin(type_):
@@ -224,12 +319,19 @@ class AvroTypeExpert:
                     values=partial_get_avro_equivalent_type_for(value_type),
                 )
 
-            case types.UnionType:
+            case types.UnionType | typing.Union:
+                # built (and checked) once here, kept for whoever uses
+                # the schema to pick branches.
+                index = get_union_branch_index(type_)
+                if union_indexes is not None:
+                    union_indexes[annotation_key(type_)] = index
+
                 union_schema = list()
                 for member_type in get_args(type_):
                     union_schema.append(
                         partial_get_avro_equivalent_type_for(member_type)
                     )
+                check_avro_union(type_, union_schema)
 
                 return union_schema
             
@@ -263,6 +365,7 @@ class PydanticToAvroSchemaMaker:
         schema_name: str | None = None,
         schema_options: SchemaOptions = SchemaOptions(),
         dp: dict[Type[Enum] | Type[BaseModel], str] | None = None,
+        union_indexes: dict[Any, UnionBranchIndex] | None = None,
     ) -> None:
 
         if not issubclass(pydantic_model, BaseModel):
@@ -282,6 +385,10 @@ class PydanticToAvroSchemaMaker:
         self.dp: dict[Type[Enum] | Type[BaseModel], str] = dp or dict()
 
         self.dp.update({self.pydantic_model: self.schema_name})
+        # branch indexes of the schema's unions, by `annotation_key`.
+        self.union_indexes: dict[Any, UnionBranchIndex] = (
+            union_indexes if union_indexes is not None else dict()
+        )
 
         self.__construct_schema()
 
@@ -289,10 +396,22 @@ class PydanticToAvroSchemaMaker:
 
         for fieldname, fieldinfo in self.pydantic_model.model_fields.items():
             curr = dict(name=fieldname)
-            fieldtype = fieldinfo.annotation
+            fieldtype = normalize_annotation(
+                fieldinfo.annotation, owner=self.pydantic_model
+            )
 
             if fieldtype in self.dp:
                 curr.update(type=self.dp.get(fieldtype))
+            elif self.schema_options.optimize_for_size and (
+                optimized := AvroTypeExpert.get_size_optimized_avro_type_equivalent_for(
+                    fieldtype,
+                    constraints=collect_constraints(fieldinfo.metadata),
+                    record_name=self.schema_name,
+                    fieldname=fieldname,
+                    schema_options=self.schema_options,
+                )
+            ) is not None:
+                curr.update(type=optimized)
             else:
                 curr.update(
                     type=get_avro_equivalent_type_for(
@@ -301,6 +420,7 @@ class PydanticToAvroSchemaMaker:
                         fieldname=fieldname,
                         schema_options=self.schema_options,
                         dp=self.dp,
+                        union_indexes=self.union_indexes,
                     )
                 )
 
@@ -21,3 +21,4 @@ class SchemaOptions(BaseModel):
     time_precision: TimePrecision = TimePrecision.MILLI_SECOND
     timestamp_precision: TimePrecision = TimePrecision.MILLI_SECOND
     local_timestamp_precision: TimePrecision = TimePrecision.MILLI_SECOND
+    optimize_for_size: bool = False
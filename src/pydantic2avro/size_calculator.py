@@ -0,0 +1,298 @@
+import datetime
+import time
+import uuid
+from enum import Enum
+from typing import Any, Callable, Iterable, Iterator, Type, TypeVar, get_args
+
+from pydantic import BaseModel
+
+from .annotation_normalizer import is_union, normalize_annotation
+from .enums import AvroDataTypes, AvroLogicalTypes
+from .exceptions import RecordTooLargeException, UnsupportedTypeException
+from .schema_component_types import AvroSchemaComponent
+from .schema_maker import PydanticToAvroSchemaMaker
+from .schema_options import SchemaOptions
+from .union_index import annotation_key
+
+Sizer = Callable[[Any], int]
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_UNIX_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def long_size(n: int) -> int:
+    """number of bytes avro's zig-zag varint encoding of `n` takes."""
+    zigzag = n << 1 if n >= 0 else ((-n) << 1) - 1
+    if zigzag < 0x80:
+        return 1
+    return (zigzag.bit_length() + 6) // 7
+
+
+def string_size(value: str) -> int:
+    length = len(value) if value.isascii() else len(value.encode("utf-8"))
+    return long_size(length) + length
+
+
+def bytes_size(value: bytes) -> int:
+    return long_size(len(value)) + len(value)
+
+
+def _epoch_seconds(value: datetime.datetime) -> int:
+    # same conversion fastavro does: naive datetimes are taken as local time.
+    if value.tzinfo is not None:
+        delta = value - _EPOCH
+        return delta.days * 24 * 3600 + delta.seconds
+    return int(time.mktime(value.timetuple()))
+
+
+_PRIMITIVE_SIZERS: dict[str, Sizer] = {
+    AvroDataTypes.NULL.value: lambda value: 0,
+    AvroDataTypes.BOOLEAN.value: lambda value: 1,
+    AvroDataTypes.INT.value: long_size,
+    AvroDataTypes.LONG.value: long_size,
+    AvroDataTypes.FLOAT.value: lambda value: 4,
+    AvroDataTypes.DOUBLE.value: lambda value: 8,
+    AvroDataTypes.BYTES.value: bytes_size,
+    AvroDataTypes.STRING.value: string_size,
+}
+
+
+def _decimal_size(schema: dict[str, Any]) -> Sizer:
+    scale = schema.get("scale", 0)
+
+    def size_of(value: Any) -> int:
+        _sign, digits, exponent = value.as_tuple()
+        if exponent + scale < 0:
+            # fastavro refuses to encode these as well.
+            raise ValueError(
+                f"{value} has more decimal places than the scale ({scale})"
+                f" of its avro schema"
+            )
+
+        unscaled = 0
+        for digit in digits:
+            unscaled = unscaled * 10 + digit
+        unscaled *= 10 ** (exponent + scale)
+
+        length = (unscaled.bit_length() + 8) // 8
+        return long_size(length) + length
+
+    return size_of
+
+
+def _logical_sizer(schema: dict[str, Any]) -> Sizer:
+    match schema["logicalType"]:
+        case AvroLogicalTypes.DECIMAL.value:
+            return _decimal_size(schema)
+
+        case AvroLogicalTypes.UUID.value:
+            return lambda value: (
+                37 if isinstance(value, uuid.UUID) else string_size(value)
+            )
+
+        case AvroLogicalTypes.DATE.value:
+            return lambda value: long_size(value.toordinal() - _UNIX_EPOCH_ORDINAL)
+
+        case AvroLogicalTypes.TIME_MILLIS.value:
+            return lambda value: long_size(
+                ((value.hour * 60 + value.minute) * 60 + value.second) * 1000
+                + value.microsecond // 1000
+            )
+
+        case AvroLogicalTypes.TIME_MICROS.value:
+            return lambda value: long_size(
+                ((value.hour * 60 + value.minute) * 60 + value.second) * 1000_000
+                + value.microsecond
+            )
+
+        case AvroLogicalTypes.TIMESTAMP_MILLIS.value:
+            return lambda value: long_size(
+                _epoch_seconds(value) * 1000 + value.microsecond // 1000
+            )
+
+        case AvroLogicalTypes.TIMESTAMP_MICROS.value:
+            return lambda value: long_size(
+                _epoch_seconds(value) * 1000_000 + value.microsecond
+            )
+
+        case AvroLogicalTypes.DURATION.value:
+            size = schema["size"]
+            return lambda value: size
+
+        case _:
+            return _PRIMITIVE_SIZERS[schema["type"]]
+
+
+class EncodedSizeCalculator:
+    """
+    Computes the exact avro binary size of instances of `pydantic_model`
+    (encoded with the schema `PydanticToAvroSchemaMaker` makes for it)
+    without encoding them.
+
+    The schema is walked once, alongside the model's annotations, into a
+    tree of sizing functions. Union branches are picked with the
+    `UnionBranchIndex`es built along with the schema.
+    """
+
+    def __init__(
+        self,
+        pydantic_model: Type[BaseModel],
+        *,
+        namespace: str | None = None,
+        schema_options: SchemaOptions = SchemaOptions(),
+    ) -> None:
+        self.pydantic_model = pydantic_model
+        maker = PydanticToAvroSchemaMaker(
+            pydantic_model,
+            namespace=namespace,
+            schema_options=schema_options,
+        )
+        self.schema = maker.get_schema()
+        self._union_indexes = maker.union_indexes
+
+        self._named: dict[str, Sizer] = dict()
+        self._size_of = self.__compile(pydantic_model, self.schema)
+
+    def size_of(self, instance: BaseModel) -> int:
+        return self._size_of(instance)
+
+    def __compile(self, type_: Any, schema: AvroSchemaComponent) -> Sizer:
+        if isinstance(schema, str):
+            if schema in _PRIMITIVE_SIZERS:
+                return _PRIMITIVE_SIZERS[schema]
+            # named type compiled earlier, looked up lazily since it may
+            # still be in the middle of being compiled (recursive records).
+            named = self._named
+            return lambda value: named[schema](value)
+
+        if isinstance(schema, list):
+            return self.__compile_union(type_, schema)
+
+        if "logicalType" in schema:
+            return _logical_sizer(schema)
+
+        match schema["type"]:
+            case AvroDataTypes.ARRAY.value:
+                items_size = self.__compile(get_args(type_)[0], schema["items"])
+
+                def size_of_array(value: Any) -> int:
+                    if not value:
+                        return 1
+                    return long_size(len(value)) + sum(map(items_size, value)) + 1
+
+                return size_of_array
+
+            case AvroDataTypes.MAP.value:
+                values_size = self.__compile(get_args(type_)[1], schema["values"])
+
+                def size_of_map(value: Any) -> int:
+                    if not value:
+                        return 1
+                    return (
+                        long_size(len(value))
+                        + sum(map(string_size, value.keys()))
+                        + sum(map(values_size, value.values()))
+                        + 1
+                    )
+
+                return size_of_map
+
+            case AvroDataTypes.ENUM.value:
+                sizes = {
+                    symbol: long_size(index)
+                    for index, symbol in enumerate(schema["symbols"])
+                }
+                size_of = self._named[schema["name"]] = lambda value: sizes[
+                    value.value if isinstance(value, Enum) else value
+                ]
+                return size_of
+
+            case AvroDataTypes.FIXED.value:
+                size = schema["size"]
+                size_of = self._named[schema["name"]] = lambda value: size
+                return size_of
+
+            case AvroDataTypes.RECORD.value:
+                return self.__compile_record(type_, schema)
+
+            case AvroDataTypes.STRING.value:
+                # pydantic networks fields
+                return lambda value: string_size(str(value))
+
+            case _:
+                raise UnsupportedTypeException(f"{schema} is unsupported")
+
+    def __compile_union(self, type_: Any, schema: list) -> Sizer:
+        if not is_union(type_):
+            raise UnsupportedTypeException(f"{type_} is not an union")
+
+        branch_index = self._union_indexes[annotation_key(type_)]
+        branch_sizes = [
+            (long_size(index), self.__compile(member_type, member_schema))
+            for index, (member_type, member_schema) in enumerate(
+                zip(get_args(type_), schema)
+            )
+        ]
+
+        def size_of_union(value: Any) -> int:
+            prefix, size_of = branch_sizes[branch_index.resolve(value)]
+            return prefix + size_of(value)
+
+        return size_of_union
+
+    def __compile_record(self, type_: Type[BaseModel], schema: dict) -> Sizer:
+        field_sizes: list[tuple[str, Sizer]] = list()
+
+        def size_of_record(value: Any) -> int:
+            values = value if isinstance(value, dict) else value.__dict__
+            return sum(
+                size_of(values[fieldname]) for fieldname, size_of in field_sizes
+            )
+
+        self._named[schema["name"]] = size_of_record
+
+        for field, fieldinfo in zip(schema["fields"], type_.model_fields.values()):
+            fieldtype = normalize_annotation(fieldinfo.annotation, owner=type_)
+            field_sizes.append(
+                (field["name"], self.__compile(fieldtype, field["type"]))
+            )
+
+        return size_of_record
+
+
+def batch_by_encoded_size(
+    instances: Iterable[ModelT],
+    max_batch_size: int,
+    calculator: EncodedSizeCalculator,
+    *,
+    record_overhead: int = 0,
+    batch_overhead: int = 0,
+) -> Iterator[list[ModelT]]:
+    """
+    Group `instances` (in order) into batches whose encoded size, i.e. the
+    sum of the records' sizes plus `record_overhead` per record plus
+    `batch_overhead` once, does not exceed `max_batch_size`.
+    """
+    batch: list[ModelT] = list()
+    batch_size = batch_overhead
+
+    for instance in instances:
+        size = calculator.size_of(instance) + record_overhead
+
+        if batch_overhead + size > max_batch_size:
+            raise RecordTooLargeException(
+                f"record of {size} bytes does not fit in a batch of"
+                f" {max_batch_size} bytes"
+            )
+
+        if batch_size + size > max_batch_size:
+            yield batch
+            batch = list()
+            batch_size = batch_overhead
+
+        batch.append(instance)
+        batch_size += size
+
+    if batch:
+        yield batch
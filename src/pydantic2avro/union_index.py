@@ -0,0 +1,212 @@
+import builtins
+import datetime
+import inspect
+import ipaddress
+import types
+import typing
+import weakref
+from enum import Enum
+from typing import Any, get_args, get_origin
+
+import pydantic
+
+from .exceptions import (AmbiguousUnionException,
+                         UnresolvableUnionBranchException,
+                         UnsupportedTypeException)
+
+
+# runtime types a validated pydantic field holds for annotations whose
+# values are not instances of the annotation itself.
+_RUNTIME_TYPES_FOR: dict[Any, tuple[type, ...]] = {
+    bytes: (bytes, bytearray),
+    pydantic.AwareDatetime: (datetime.datetime,),
+    pydantic.NaiveDatetime: (datetime.datetime,),
+    pydantic.EmailStr: (str,),
+    pydantic.IPvAnyAddress: (ipaddress.IPv4Address, ipaddress.IPv6Address),
+    pydantic.IPvAnyInterface: (ipaddress.IPv4Interface, ipaddress.IPv6Interface),
+    pydantic.IPvAnyNetwork: (ipaddress.IPv4Network, ipaddress.IPv6Network),
+}
+
+# runtime types a branch accepts only when no other branch claims them
+# exactly (pydantic coerces `int` into `float` fields, avro writers do too).
+_COERCIBLE_TYPES_FOR: dict[Any, tuple[type, ...]] = {
+    float: (int,),
+}
+
+
+class UnionBranchIndex:
+    """
+    Precomputed branch selection for an avro union built from a python union.
+
+    Branch positions match the order of `get_args(union_type)`, which is also
+    the order of the branches in the generated avro union, so
+    `resolve(value)` gives the index of the branch `value` must be written
+    with in a single dict lookup.
+    """
+
+    __slots__ = ("union_type", "_by_type", "_by_symbol", "_shared_symbols",
+                 "_strict_symbols", "__weakref__")
+
+    def __init__(self, union_type: Any) -> None:
+        self.union_type = union_type
+        self._by_type: dict[type, int] = dict()
+        self._by_symbol: dict[str, int] = dict()
+        self._shared_symbols: set[str] = set()
+        self._strict_symbols: set[str] = set()
+
+        coercible: dict[type, int] = dict()
+        str_claimed_by_literal: int | None = None
+
+        for index, member_type in enumerate(get_args(union_type)):
+            if get_origin(member_type) is typing.Literal:
+                for symbol in get_args(member_type):
+                    self._claim_symbol(symbol, index, strict=True)
+                str_claimed_by_literal = index
+                continue
+
+            if inspect.isclass(member_type) and issubclass(member_type, Enum):
+                for member in iter(member_type):
+                    self._claim_symbol(member.value, index, strict=False)
+
+            for runtime_type in self.runtime_types_for(member_type):
+                self._claim_type(runtime_type, index)
+
+            for runtime_type in _COERCIBLE_TYPES_FOR.get(member_type, ()):
+                coercible.setdefault(runtime_type, index)
+
+        if str_claimed_by_literal is not None and str in self._by_type:
+            raise AmbiguousUnionException(
+                f"`Literal` branch of {union_type} can not be told apart from"
+                f" branch #{self._by_type[str]} since both hold `str` values"
+            )
+
+        for runtime_type, index in coercible.items():
+            self._by_type.setdefault(runtime_type, index)
+
+    def _claim_type(self, runtime_type: type, index: int) -> None:
+        if runtime_type in self._by_type:
+            raise AmbiguousUnionException(
+                f"branches #{self._by_type[runtime_type]} and #{index} of"
+                f" {self.union_type} both hold {runtime_type} values"
+            )
+        self._by_type[runtime_type] = index
+
+    def _claim_symbol(self, symbol: str, index: int, strict: bool) -> None:
+        # enum members are told apart by their class, so a symbol shared by
+        # two enums only stops plain strings from resolving to either of them.
+        # `Literal` members are plain strings, they have nothing else to go by.
+        if symbol in self._by_symbol or symbol in self._shared_symbols:
+            if strict or symbol in self._strict_symbols:
+                raise AmbiguousUnionException(
+                    f"more than one branch of {self.union_type} has"
+                    f" {symbol!r} as a symbol"
+                )
+            self._by_symbol.pop(symbol, None)
+            self._shared_symbols.add(symbol)
+            return
+
+        if strict:
+            self._strict_symbols.add(symbol)
+        self._by_symbol[symbol] = index
+
+    @staticmethod
+    def runtime_types_for(type_: Any) -> tuple[type, ...]:
+        if type_ in _RUNTIME_TYPES_FOR:
+            return _RUNTIME_TYPES_FOR[type_]
+
+        match get_origin(type_):
+            case None:
+                pass
+            case builtins.list:
+                return (list,)
+            case builtins.dict:
+                return (dict,)
+            case _:
+                raise UnsupportedTypeException(
+                    f"{type_} can not be a direct member of an union"
+                )
+
+        if type_ is None or type_ is types.NoneType:
+            return (types.NoneType,)
+        elif inspect.isclass(type_):
+            return (type_,)
+
+        raise UnsupportedTypeException(f"{type_} is unsupported")
+
+    def resolve(self, value: Any) -> int:
+        try:
+            return self._by_type[type(value)]
+        except KeyError:
+            pass
+
+        if isinstance(value, str) and value in self._by_symbol:
+            return self._by_symbol[value]
+
+        for base in type(value).__mro__[1:]:
+            if base in self._by_type:
+                index = self._by_type[type(value)] = self._by_type[base]
+                return index
+
+        raise UnresolvableUnionBranchException(
+            f"{type(value)} does not match any branch of {self.union_type}"
+        )
+
+
+_NAMED_AVRO_TYPES = ("record", "enum", "fixed")
+
+
+def _avro_branch_key(schema: Any) -> str:
+    if isinstance(schema, str):  # primitive or reference to a named type
+        return str(getattr(schema, "value", schema))
+    if schema["type"] in _NAMED_AVRO_TYPES and "name" in schema:
+        return schema["name"]
+    # logical types (and pydantic networks types) count as their
+    # underlying type, e.g. `uuid` and `HttpUrl` both as `string`.
+    return _avro_branch_key(schema["type"])
+
+
+def check_avro_union(union_type: Any, union_schema: list) -> None:
+    """
+    Raises `AmbiguousUnionException` when the avro union `union_schema`,
+    made for `union_type`, is not a valid avro union: it may hold only one
+    branch of each unnamed type (whatever their logical types) and only one
+    named type of each name.
+    """
+    seen: dict[str, int] = dict()
+    for index, schema in enumerate(union_schema):
+        key = _avro_branch_key(schema)
+        if key in seen:
+            raise AmbiguousUnionException(
+                f"branches #{seen[key]} and #{index} of {union_type} are both"
+                f" avro `{key}`, which avro unions do not allow"
+            )
+        seen[key] = index
+
+
+def annotation_key(type_: Any) -> Any:
+    """
+    Hashable key for `type_` that, unlike the annotation itself, tells
+    apart annotations python considers equal but which list their members
+    in a different order, e.g. `int | None` and `None | int` or
+    `Literal["a", "b"]` and `Literal["b", "a"]`.
+    """
+    origin = get_origin(type_)
+    if origin is None:
+        # `Literal` values are told apart by type too, `1 == True`.
+        return type_ if isinstance(type_, type) else (type(type_), type_)
+    return (origin, tuple(annotation_key(arg) for arg in get_args(type_)))
+
+
+# shared while in use, keys hold the union's member types (often models)
+# and must not keep them alive once nothing uses the index anymore.
+_union_branch_indexes: "weakref.WeakValueDictionary[Any, UnionBranchIndex]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def get_union_branch_index(union_type: Any) -> UnionBranchIndex:
+    key = annotation_key(union_type)
+    index = _union_branch_indexes.get(key)
+    if index is None:
+        index = _union_branch_indexes[key] = UnionBranchIndex(union_type)
+    return index
@@ -0,0 +1,2 @@
+# kept in sync with `version` in pyproject.toml.
+__version__ = "0.4.1"
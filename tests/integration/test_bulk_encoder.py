@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from enum import Enum
+from io import BytesIO
+from uuid import UUID, uuid4
+
+import fastavro
+from pydantic import BaseModel
+
+from pydantic2avro import PydanticToAvroSchemaMaker, encode_many
+
+
+class GenderType(str, Enum):
+    MALE = "MALE"
+    FEMALE = "FEMALE"
+
+class Address(BaseModel):
+    street: str
+    zip_code: int
+
+class Person(BaseModel):
+    pid: UUID
+    name: str
+    gender: GenderType
+    address: Address | None
+    balance: Decimal
+
+
+def make_people(count: int) -> list[Person]:
+    return [
+        Person(
+            pid=uuid4(),
+            name="x" * (index % 50),
+            gender=GenderType.MALE if index % 2 else GenderType.FEMALE,
+            address=Address(street="XXXX Siebarth Dr", zip_code=index) if index % 3 else None,
+            balance=Decimal(index),
+        )
+        for index in range(count)
+    ]
+
+
+def encode_one_by_one(people: list) -> list[bytes]:
+    schema = fastavro.parse_schema(PydanticToAvroSchemaMaker(Person).get_schema())
+
+    encoded = list()
+    for person in people:
+        fobj = BytesIO()
+        record = person.model_dump() if isinstance(person, BaseModel) else person
+        fastavro.schemaless_writer(fobj, schema, record)
+        encoded.append(fobj.getvalue())
+
+    return encoded
+
+
+def test_encode_many_single_process() -> None:
+    people = make_people(100)
+
+    encoded = encode_many(Person, people, processes=1)
+
+    assert [bytes(record) for record in encoded] == encode_one_by_one(people)
+
+
+def test_encode_many_process_pool() -> None:
+    people = make_people(1000)
+    records = [person.model_dump() for person in people[::2]] + people[1::2]
+
+    segments_before = set(os.listdir("/dev/shm"))
+
+    with encode_many(Person, records, processes=3, chunk_size=64) as encoded:
+        assert len(encoded) == len(records)
+        assert [bytes(record) for record in encoded] == encode_one_by_one(records)
+        assert bytes(encoded[-1]) == encode_one_by_one(records[-1:])[0]
+        assert bytes(encoded[64]) == encode_one_by_one(records[64:65])[0]
+
+    assert set(os.listdir("/dev/shm")) <= segments_before
+
+
+def test_items_may_outlive_the_with_block(capfd) -> None:
+    people = make_people(300)
+    segments_before = set(os.listdir("/dev/shm"))
+
+    with encode_many(Person, people, processes=2, chunk_size=64) as encoded:
+        for record in encoded:
+            pass
+
+    assert bytes(record) == encode_one_by_one(people[-1:])[0]
+    assert set(os.listdir("/dev/shm")) <= segments_before
+
+    del record, encoded
+    assert "Exception ignored" not in capfd.readouterr().err
+
+
+def test_executor_is_reused_across_calls() -> None:
+    people = make_people(300)
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        for batch in (people[:150], people[150:]):
+            with encode_many(Person, batch, chunk_size=32, executor=executor) as encoded:
+                assert [bytes(record) for record in encoded] == encode_one_by_one(batch)
+
+        # not shut down by `encode_many`.
+        assert executor.submit(len, "abc").result() == 3
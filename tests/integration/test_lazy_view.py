@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import gc
+import mmap
+import weakref
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from enum import Enum
+from io import BytesIO
+from typing import Literal
+from uuid import UUID, uuid4
+
+import fastavro
+from pydantic import BaseModel, NaiveDatetime
+
+from pydantic2avro import (DecimalOptions, SchemaOptions, TimePrecision,
+                           lazy_view_class)
+
+
+class DiscountOffers(str, Enum):
+    TEN_PERCENT_OFF = "TEN_PERCENT_OFF"
+    FIFTY_PERCENT_OFF = "FIFTY_PERCENT_OFF"
+
+class Manufacturer(BaseModel):
+    name: str
+    country: str
+    founded: int
+
+class Product(BaseModel):
+    pid: UUID
+    name: str
+    thumbnail: bytes
+    tags: list[str] | None
+    offers: list[DiscountOffers] | None
+    manufacturer: Manufacturer
+    complementary_products: list[Product] | None
+    details: dict[str, None | int | str | Manufacturer] | None
+    status: Literal["draft", "published"]
+    price: Decimal
+    weight: float
+    in_stock: bool
+    released: date
+    opens_at: time
+    updated_at: datetime
+
+
+schema_options = SchemaOptions(
+    decimal=DecimalOptions(precision=10, scale=2),
+    time_precision=TimePrecision.MICRO_SECOND,
+    timestamp_precision=TimePrecision.MICRO_SECOND,
+)
+
+
+def make_product(**overrides) -> Product:
+    values = dict(
+        pid=uuid4(),
+        name="Ünïcode phone",
+        thumbnail=b"\x89PNG",
+        tags=["electronics", "value for money"],
+        offers=[DiscountOffers.FIFTY_PERCENT_OFF],
+        manufacturer=Manufacturer(name="SomeGoodManufacturer", country="India", founded=1999),
+        complementary_products=None,
+        details={
+            "mfg. year": 2024,
+            "color": "black",
+            "assembler": Manufacturer(name="Other", country="Japan", founded=-5),
+            "warranty": None,
+        },
+        status="published",
+        price=Decimal("-12345.67"),
+        weight=0.25,
+        in_stock=True,
+        released=date(2024, 2, 29),
+        opens_at=time(9, 30, 0, 123456),
+        updated_at=datetime(2024, 2, 29, 12, 30, 1, 654321, tzinfo=timezone.utc),
+    )
+    values.update(overrides)
+    return Product(**values)
+
+
+def encode(product: Product) -> bytes:
+    View = lazy_view_class(Product, schema_options=schema_options)
+    fobj = BytesIO()
+    schema = fastavro.parse_schema(View.schema)
+    fastavro.schemaless_writer(fobj, schema, product.model_dump())
+    return fobj.getvalue()
+
+
+def test_lazy_field_access() -> None:
+    product = make_product(
+        complementary_products=[make_product(tags=None, details=None)]
+    )
+    View = lazy_view_class(Product, schema_options=schema_options)
+    view = View(encode(product))
+
+    assert view.status == "published"
+    assert isinstance(view.name, memoryview)
+    assert bytes(view.name) == product.name.encode()
+    assert view.materialize("name") == product.name
+    assert view.thumbnail == b"\x89PNG"
+    assert view.price == product.price
+    assert view.updated_at == product.updated_at
+    assert view.manufacturer.founded == 1999
+    assert view.manufacturer.to_model() == product.manufacturer
+    assert view.complementary_products[0] == product.complementary_products[0]
+
+
+def test_to_model_round_trip() -> None:
+    product = make_product(
+        complementary_products=[make_product(details={})],
+        tags=[],
+        offers=None,
+    )
+    View = lazy_view_class(Product, schema_options=schema_options)
+
+    assert View(encode(product)).to_model() == product
+
+
+def test_view_over_mmap_and_offsets(tmp_path) -> None:
+    products = [make_product(name=str(index) * index) for index in range(5)]
+
+    path = tmp_path / "products.bin"
+    path.write_bytes(b"".join(encode(product) for product in products))
+
+    View = lazy_view_class(Product, schema_options=schema_options)
+    with open(path, "rb") as fobj, mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        buffer = memoryview(mm)
+        start = 0
+        for product in products:
+            view = View(buffer, start)
+            assert view.materialize("name") == product.name
+            start += view.encoded_size
+            del view
+
+        del buffer
+
+
+def test_view_class_is_cached() -> None:
+    assert lazy_view_class(Product) is lazy_view_class(Product)
+
+
+def test_view_class_cache_does_not_keep_models_alive() -> None:
+    class Sample(BaseModel):
+        value: int
+        children: list[Sample] | None
+
+    View = lazy_view_class(Sample)
+    assert lazy_view_class(Sample) is View
+
+    model = weakref.ref(Sample)
+    del Sample, View
+    gc.collect()  # the view class, dropping its cache entry
+    gc.collect()  # then the model
+
+    assert model() is None
+
+
+class Reading(BaseModel):
+    to_model: str
+    encoded_size: int
+    taken_at: NaiveDatetime
+    calibrated_at: NaiveDatetime | None
+
+
+def test_fields_named_like_view_attributes() -> None:
+    reading = Reading(
+        to_model="thermometer",
+        encoded_size=-1,
+        taken_at=datetime(2024, 2, 29, 12, 30, 1, 654321),
+        calibrated_at=datetime(1969, 7, 20, 20, 17, 40, 5000),
+    )
+    View = lazy_view_class(Reading, schema_options=schema_options)
+
+    fobj = BytesIO()
+    fastavro.schemaless_writer(fobj, fastavro.parse_schema(View.schema), reading.model_dump())
+    view = View(fobj.getvalue())
+
+    assert bytes(view["to_model"]) == b"thermometer"
+    assert view["encoded_size"] == -1
+    assert view.encoded_size == len(fobj.getvalue())
+    assert view.taken_at == reading.taken_at
+    assert view.taken_at.tzinfo is None
+    assert view.to_model() == reading
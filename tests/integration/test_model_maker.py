@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import json
+import os
+import stat
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import Literal
+from uuid import UUID, uuid4
+
+import pytest
+from pydantic import BaseModel, EmailStr
+
+from pydantic2avro import (AvroToPydanticModelMaker, DecimalOptions,
+                           PydanticToAvroSchemaMaker, SchemaOptions,
+                           load_pydantic_models)
+from pydantic2avro import model_maker
+from pydantic2avro.exceptions import UnsupportedTypeException
+
+from ..utils import validate_avro_schema
+
+
+class GenderType(str, Enum):
+    MALE = "MALE"
+    FEMALE = "FEMALE"
+
+class Address(BaseModel):
+    street: str
+    zip_code: int
+
+class Person(BaseModel):
+    pid: UUID
+    name: str
+    email: EmailStr
+    gender: GenderType
+    status: Literal["active", "blocked"]
+    address: Address | None
+    previous_addresses: list[Address]
+    tags: dict[str, str | int | None]
+    dob: date
+    wakes_up_at: time
+    created_at: datetime
+    avatar: bytes
+    score: float
+    verified: bool
+    friends: list[Person] | None
+
+
+def test_round_trip_of_generated_models(tmp_path) -> None:
+    schema = PydanticToAvroSchemaMaker(Person, namespace="sharma.kunal").get_schema()
+
+    module = load_pydantic_models(schema, tmp_path)
+
+    assert module.ROOT_MODEL is module.Person
+    assert issubclass(module.GenderType, Enum)
+    regenerated = json.loads(
+        PydanticToAvroSchemaMaker(module.Person, namespace="sharma.kunal").get_schema_str()
+    )
+    original = json.loads(json.dumps(schema))
+
+    # enums made from `Literal`s get capitalized class names
+    assert regenerated["fields"][4]["type"] == dict(
+        original["fields"][4]["type"], name="sharma.kunal.Status"
+    )
+    regenerated["fields"][4] = original["fields"][4]
+    assert regenerated == original
+
+
+def test_generated_models_validate_records(tmp_path) -> None:
+    schema = {
+        "type": "record",
+        "name": "Order",
+        "namespace": "shop",
+        "fields": [
+            {"name": "oid", "type": {"type": "string", "logicalType": "uuid"}},
+            {"name": "class", "type": "string", "default": "standard"},
+            {"name": "amount", "type": {"type": "bytes", "logicalType": "decimal", "precision": 8, "scale": 2}},
+            {"name": "digest", "type": {"type": "fixed", "name": "MD5", "size": 4}},
+            {"name": "checksum", "type": ["null", "MD5"], "default": None},
+            {"name": "placed_at", "type": {"type": "long", "logicalType": "timestamp-micros"}},
+            {"name": "channel", "type": {"type": "enum", "name": "Channel", "symbols": ["WEB", "APP"]}, "default": "WEB"},
+            {"name": "items", "type": {"type": "array", "items": {
+                "type": "record", "name": "Item", "fields": [
+                    {"name": "sku", "type": "string"},
+                    {"name": "quantity", "type": "int", "default": 1},
+                ]
+            }}, "default": []},
+        ],
+    }
+
+    module = load_pydantic_models(schema, tmp_path)
+
+    order = module.Order(
+        oid=uuid4(),
+        amount=Decimal("123.45"),
+        digest=b"\x00\x01\x02\x03",
+        placed_at=datetime(2024, 2, 29, tzinfo=timezone.utc),
+        items=[module.Item(sku="ABC")],
+    )
+
+    assert order.class_ == "standard"
+    assert order.channel is module.Channel.WEB
+    assert order.items[0].quantity == 1
+
+    record = order.model_dump(by_alias=True)
+    validate_avro_schema(schema=schema, records=[record])
+
+
+def test_fields_named_like_modules(tmp_path) -> None:
+    schema = {
+        "type": "record",
+        "name": "Event",
+        "fields": [
+            {"name": "uuid", "type": ["null", {"type": "string", "logicalType": "uuid"}], "default": None},
+            {"name": "datetime", "type": {"type": "long", "logicalType": "timestamp-millis"}},
+            {"name": "decimal", "type": {"type": "bytes", "logicalType": "decimal", "precision": 4}},
+            {"name": "pydantic", "type": "string"},
+            {"name": "typing", "type": {"type": "fixed", "name": "Tag", "size": 2}},
+        ],
+    }
+
+    module = load_pydantic_models(schema, tmp_path)
+
+    pid = uuid4()
+    event = module.Event(
+        uuid=pid,
+        datetime=datetime(2024, 2, 29, tzinfo=timezone.utc),
+        decimal=Decimal(12),
+        pydantic="v2",
+        typing=b"ab",
+    )
+    assert event.uuid == pid
+
+    validate_avro_schema(schema=schema, records=[event.model_dump()])
+
+
+INJECTED = "x: int\n    import os; print('PWNED', os.getpid())\n    y"
+
+
+@pytest.mark.parametrize("schema", [
+    {"type": "record", "name": "Event", "fields": [{"name": INJECTED, "type": "string"}]},
+    {"type": "record", "name": INJECTED, "fields": []},
+    {"type": "record", "name": "Event", "namespace": f"shop.{INJECTED}", "fields": []},
+    {"type": "record", "name": "Event", "fields": [
+        {"name": "kind", "type": {"type": "enum", "name": "Kind", "symbols": ["A", INJECTED]}},
+    ]},
+    {"type": "record", "name": "Event", "fields": [
+        {"name": "tag", "type": {"type": "fixed", "name": "Tag", "size": "2) or print('PWNED'"}},
+    ]},
+    {"type": "record", "name": "Event", "fields": [
+        {"name": "amount", "type": {"type": "bytes", "logicalType": "decimal", "precision": "4) or print('PWNED'"}},
+    ]},
+])
+def test_invalid_names_are_rejected(tmp_path, schema) -> None:
+    with pytest.raises(UnsupportedTypeException):
+        load_pydantic_models(schema, tmp_path)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_colliding_python_names(tmp_path) -> None:
+    schema = {
+        "type": "record",
+        "name": "_pydantic",
+        "fields": [
+            {"name": "class", "type": {"type": "enum", "name": "Kind", "symbols": ["class", "class_"]}},
+            {"name": "class_", "type": "string"},
+        ],
+    }
+
+    module = load_pydantic_models(schema, tmp_path)
+    record = module.ROOT_MODEL.model_validate({"class": "class_", "class_": "x"})
+
+    assert record.model_dump(by_alias=True) == {"class": "class_", "class_": "x"}
+    assert [member.value for member in module.Kind] == ["class", "class_"]
+
+
+def test_generated_modules_are_readable_by_others(tmp_path) -> None:
+    schema = PydanticToAvroSchemaMaker(Address, namespace="sharma.kunal.mode").get_schema()
+
+    module = load_pydantic_models(schema, tmp_path)
+
+    assert stat.S_IMODE(os.stat(module.__file__).st_mode) == 0o644
+
+
+def test_generated_modules_are_cached(tmp_path, monkeypatch) -> None:
+    schema = PydanticToAvroSchemaMaker(
+        Address,
+        namespace="sharma.kunal.cached",
+        schema_options=SchemaOptions(decimal=DecimalOptions(precision=4)),
+    ).get_schema()
+
+    module = load_pydantic_models(schema, tmp_path)
+    assert len(list(tmp_path.glob("*.py"))) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("module must come from the cache")
+
+    monkeypatch.setattr(model_maker, "AvroToPydanticModelMaker", fail)
+
+    assert load_pydantic_models(schema, tmp_path) is module
+
+    del __import__("sys").modules[module.__name__]
+    reloaded = load_pydantic_models(json.dumps(schema), tmp_path)
+    assert reloaded.Address(street="x", zip_code=1).zip_code == 1
+
+
+def test_from_avsc(tmp_path) -> None:
+    path = tmp_path / "address.avsc"
+    path.write_text(PydanticToAvroSchemaMaker(Address).get_schema_str())
+
+    source = AvroToPydanticModelMaker.from_avsc(path).get_source()
+
+    assert "class Address(_pydantic.BaseModel):" in source
+    assert "    zip_code: int\n" in source
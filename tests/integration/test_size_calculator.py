@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from enum import Enum
+from io import BytesIO
+from typing import Literal
+from uuid import UUID, uuid4
+
+import fastavro
+import pytest
+from pydantic import AnyUrl, BaseModel, conbytes, conint
+
+from pydantic2avro import (EncodedSizeCalculator, SchemaOptions,
+                           DecimalOptions, TimePrecision,
+                           batch_by_encoded_size)
+from pydantic2avro.exceptions import RecordTooLargeException
+
+
+class DiscountOffers(str, Enum):
+    TEN_PERCENT_OFF = "TEN_PERCENT_OFF"
+    FIFTY_PERCENT_OFF = "FIFTY_PERCENT_OFF"
+
+class FreeProductOffer(str, Enum):
+    FREE_SAMPLE = "FREE_SAMPLE"
+    BUY_ONE_GET_ONE_FREE = "BUY_ONE_GET_ONE_FREE"
+
+class Manufacturer(BaseModel):
+    name: str
+    country: str
+    founded: int
+
+class Product(BaseModel):
+    pid: UUID
+    tags: list[str] | None
+    offers: list[DiscountOffers | FreeProductOffer] | None
+    complementary_products: list[Product] | None
+    details: dict[str, None | int | str | dict[str, str | list[str]] | Manufacturer] | None
+
+class Event(BaseModel):
+    kind: Literal["created", "updated", "deleted"]
+    source: AnyUrl
+    score: float
+    amount: Decimal
+    day: date
+    at: time
+    created_at: datetime
+    updated_at: datetime
+    sensor: conint(ge=0, le=255)
+    digest: conbytes(min_length=4, max_length=4)
+    note: str
+
+
+def encoded_size(calculator: EncodedSizeCalculator, record: dict) -> int:
+    fobj = BytesIO()
+    schema = fastavro.parse_schema(calculator.schema)
+    fastavro.schemaless_writer(fobj, schema, record)
+    return len(fobj.getvalue())
+
+
+def test_size_of_complex_types() -> None:
+    products = [
+        Product(
+            pid=uuid4(),
+            tags=["electronics", "longer battery life", "vålue for mønéy"],
+            offers=[FreeProductOffer.BUY_ONE_GET_ONE_FREE, DiscountOffers.FIFTY_PERCENT_OFF],
+            complementary_products=[
+                Product(
+                    pid=uuid4(),
+                    tags=[],
+                    offers=None,
+                    complementary_products=None,
+                    details={},
+                )
+            ],
+            details={
+                "mfg. year": 2024,
+                "price": -(2 ** 40),
+                "manufacturer": Manufacturer(name="SomeGoodManufacturer", country="India", founded=1999),
+                "specs": {"body": "titanium", "connectivity": ["cellular", "wifi"]},
+                "warranty": None,
+            },
+        ),
+        Product(pid=uuid4(), tags=None, offers=None, complementary_products=None, details=None),
+    ]
+
+    calculator = EncodedSizeCalculator(Product, namespace="sharma.kunal")
+
+    for product in products:
+        assert calculator.size_of(product) == encoded_size(calculator, product.model_dump())
+
+
+@pytest.mark.parametrize("precision", [TimePrecision.MILLI_SECOND, TimePrecision.MICRO_SECOND])
+def test_size_of_logical_and_optimized_types(precision: TimePrecision) -> None:
+    events = [
+        Event(
+            kind="updated",
+            source="https://example.com/a/b?c=d",
+            score=0.5,
+            amount=Decimal("-1234567.89"),
+            day=date(2024, 2, 29),
+            at=time(23, 59, 59, 999999),
+            created_at=datetime(2024, 2, 29, 12, 30, tzinfo=timezone.utc),
+            updated_at=datetime(1969, 12, 31, 23, 59, 59),
+            sensor=200,
+            digest=b"\x00\x01\x02\x03",
+            note="",
+        ),
+    ]
+
+    schema_options = SchemaOptions(
+        decimal=DecimalOptions(precision=12, scale=3),
+        time_precision=precision,
+        timestamp_precision=precision,
+        optimize_for_size=True,
+    )
+    calculator = EncodedSizeCalculator(Event, schema_options=schema_options)
+
+    for event in events:
+        record = event.model_dump()
+        record["source"] = str(record["source"])
+
+        assert calculator.size_of(event) == encoded_size(calculator, record)
+
+
+def test_batch_by_encoded_size() -> None:
+    manufacturers = [
+        Manufacturer(name="x" * length, country="India", founded=1999) for length in range(20)
+    ]
+    calculator = EncodedSizeCalculator(Manufacturer)
+
+    batches = list(batch_by_encoded_size(manufacturers, 64, calculator, batch_overhead=4))
+
+    assert [m for batch in batches for m in batch] == manufacturers
+    for batch in batches:
+        assert 4 + sum(map(calculator.size_of, batch)) <= 64
+
+    with pytest.raises(RecordTooLargeException):
+        list(batch_by_encoded_size(manufacturers, 16, calculator))
+
+
+def test_decimal_with_more_places_than_the_scale() -> None:
+    class Payment(BaseModel):
+        amount: Decimal
+
+    schema_options = SchemaOptions(decimal=DecimalOptions(precision=10, scale=2))
+    calculator = EncodedSizeCalculator(Payment, schema_options=schema_options)
+
+    assert calculator.size_of(Payment(amount=Decimal("1.2"))) == encoded_size(
+        calculator, dict(amount=Decimal("1.2"))
+    )
+
+    with pytest.raises(ValueError, match="scale"):
+        calculator.size_of(Payment(amount=Decimal("1.234")))
+
+    with pytest.raises(ValueError):
+        encoded_size(calculator, dict(amount=Decimal("1.234")))
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from pydantic import BaseModel, Field, conbytes, condecimal, conint
+
+from pydantic2avro import PydanticToAvroSchemaMaker, SchemaOptions
+
+from ..utils import validate_avro_schema
+
+
+class Reading(BaseModel):
+    sensor: conint(ge=0, le=255)
+    offset: int = Field(gt=-5, lt=10)
+    counter: conint(ge=0)
+    serial: int = Field(ge=1e10, le=1e16)
+    digest: conbytes(min_length=16, max_length=16)
+    payload: bytes = Field(max_length=16)
+    value: condecimal(max_digits=5, decimal_places=2)
+    ratio: float = Field(ge=0, le=1)
+
+
+def test_size_optimized_types() -> None:
+    readings = [
+        Reading(
+            sensor=255,
+            offset=-4,
+            counter=2 ** 40,
+            serial=123456789010,
+            digest=b"0123456789abcdef",
+            payload=b"hello",
+            value=Decimal("123.45"),
+            ratio=0.5,
+        )
+    ]
+
+    records = [reading.model_dump() for reading in readings]
+
+    schema = PydanticToAvroSchemaMaker(
+        Reading,
+        namespace="sharma.kunal",
+        schema_options=SchemaOptions(optimize_for_size=True),
+    ).get_schema()
+
+    from pprint import pprint
+    pprint(schema)
+    print()
+
+    types = {field["name"]: field["type"] for field in schema["fields"]}
+    assert types["sensor"] == "int"
+    assert types["offset"] == "int"
+    assert types["counter"] == "long"
+    assert types["serial"] == "long"
+    assert types["digest"] == dict(name="sharma.kunal.Reading.digest", type="fixed", size=16)
+    assert types["payload"] == "bytes"
+    assert types["value"] == dict(
+        type="bytes", logicalType="decimal", precision=5, scale=2
+    )
+    assert types["ratio"] == "double"
+
+    validate_avro_schema(schema=schema, records=records)
+
+
+def test_constraints_ignored_by_default() -> None:
+    schema = PydanticToAvroSchemaMaker(Reading).get_schema()
+
+    types = {field["name"]: field["type"] for field in schema["fields"]}
+    assert types["sensor"] == "long"
+    assert types["digest"] == "bytes"
+
+
+class Part(BaseModel):
+    digest: conbytes(min_length=4, max_length=4)
+
+
+class Whole(BaseModel):
+    digest: conbytes(min_length=8, max_length=8)
+    parts: list[Part]
+
+
+def test_fixed_fields_of_same_name_in_nested_models() -> None:
+    wholes = [
+        Whole(digest=b"01234567", parts=[Part(digest=b"0123"), Part(digest=b"4567")])
+    ]
+
+    records = [whole.model_dump() for whole in wholes]
+
+    schema = PydanticToAvroSchemaMaker(
+        Whole,
+        namespace="sharma.kunal",
+        schema_options=SchemaOptions(optimize_for_size=True),
+    ).get_schema()
+
+    assert schema["fields"][0]["type"]["name"] == "sharma.kunal.Whole.digest"
+    assert schema["fields"][1]["type"]["items"]["fields"][0]["type"]["name"] == (
+        "sharma.kunal.Part.digest"
+    )
+
+    validate_avro_schema(schema=schema, records=records)
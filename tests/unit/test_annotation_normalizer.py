@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from typing import Annotated, Dict, List, Literal, Optional, Union
+
+from pydantic import BaseModel, Field
+
+from pydantic2avro import PydanticToAvroSchemaMaker
+from pydantic2avro.annotation_normalizer import normalize_annotation
+
+from ..utils import validate_avro_schema
+
+
+class Manufacturer(BaseModel):
+    name: str
+    country: str
+
+
+class Product(BaseModel):
+    name: Optional[str]
+    tags: List[str]
+    quantity: Union[int, float, None]
+    details: Dict[str, Union[None, int, List[Annotated[str, Field(max_length=8)]]]]
+    manufacturer: Optional[Manufacturer]
+    status: Optional[Literal["draft", "published"]]
+    related: Optional[List["Product"]]
+
+
+def test_normalized_annotations() -> None:
+    assert normalize_annotation(Optional[int]) == int | None
+    assert normalize_annotation(Union[int, str]) == int | str
+    assert normalize_annotation(List[Dict[str, int]]) == list[dict[str, int]]
+    assert normalize_annotation(Annotated[List[int], "meta"]) == list[int]
+    assert normalize_annotation(List[Optional[Annotated[int, "meta"]]]) == list[int | None]
+    assert normalize_annotation(int) is int
+
+
+def test_forward_references() -> None:
+    assert normalize_annotation("Manufacturer", owner=Product) is Manufacturer
+    assert normalize_annotation(Optional[List["Product"]], owner=Product) == (
+        list[Product] | None
+    )
+
+
+def test_normalization_is_memoized() -> None:
+    annotation = Product.model_fields["details"].annotation
+
+    assert normalize_annotation(annotation, owner=Product) is (
+        normalize_annotation(annotation, owner=Product)
+    )
+
+
+class Measurement(BaseModel):
+    x: None | str | int
+    y: str | int | None
+    z: Literal["b", "a"]
+    w: Literal["a", "b"]
+
+
+def test_equal_unions_keep_their_member_order() -> None:
+    schema = PydanticToAvroSchemaMaker(Measurement).get_schema()
+
+    types = {field["name"]: field["type"] for field in schema["fields"]}
+    assert types["x"] == ["null", "string", "long"]
+    assert types["y"] == ["string", "long", "null"]
+    assert types["z"]["symbols"] == ["b", "a"]
+    assert types["w"]["symbols"] == ["a", "b"]
+
+
+def test_typing_constructs_schema() -> None:
+    products = [
+        Product(
+            name=None,
+            tags=["electronics"],
+            quantity=1.5,
+            details={"mfg. year": 2024, "colors": ["black", "blue"], "note": None},
+            manufacturer=Manufacturer(name="SomeGoodManufacturer", country="India"),
+            status="draft",
+            related=[
+                Product(
+                    name="case",
+                    tags=[],
+                    quantity=3,
+                    details={},
+                    manufacturer=None,
+                    status=None,
+                    related=None,
+                )
+            ],
+        )
+    ]
+
+    records = [product.model_dump() for product in products]
+
+    schema = PydanticToAvroSchemaMaker(Product, namespace="sharma.kunal").get_schema()
+
+    from pprint import pprint
+    pprint(schema)
+    print()
+
+    types = {field["name"]: field["type"] for field in schema["fields"]}
+    assert types["name"] == ["string", "null"]
+    assert types["tags"] == dict(type="array", items="string")
+    assert types["related"] == [dict(type="array", items="sharma.kunal.Product"), "null"]
+
+    validate_avro_schema(schema=schema, records=records)
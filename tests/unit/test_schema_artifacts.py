@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+from enum import Enum
+from typing import Annotated
+from uuid import UUID
+
+from pydantic import AfterValidator, BaseModel
+
+from pydantic2avro import (PydanticToAvroSchemaMaker, SchemaArtifacts,
+                           compile_schema_artifacts)
+from pydantic2avro import __version__, schema_artifacts
+
+
+class GenderType(str, Enum):
+    MALE = "MALE"
+    FEMALE = "FEMALE"
+
+class Address(BaseModel):
+    street: str
+    zip_code: int
+
+def strip(value: str) -> str:
+    return value.strip()
+
+class Note(BaseModel):
+    text: Annotated[str, AfterValidator(strip)]
+    tags: list[Annotated[str, AfterValidator(strip)]]
+
+class Person(BaseModel):
+    pid: UUID
+    gender: GenderType
+    address: Address
+
+class Household(BaseModel):
+    hid: UUID
+    name: str
+    head: Person
+    members: list[Person]
+    addresses: dict[str, Address]
+    notes: list[Note] | None
+    size: int
+    income: float | None
+    tags: list[str]
+
+
+def test_artifacts_round_trip(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "schemas.bin"
+    compile_schema_artifacts(path, [Person], namespace="sharma.kunal")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("schema must come from the artifact")
+
+    monkeypatch.setattr(schema_artifacts, "PydanticToAvroSchemaMaker", fail)
+
+    compiled = SchemaArtifacts.load(path).get(Person, namespace="sharma.kunal")
+
+    assert compiled.schema == PydanticToAvroSchemaMaker(
+        Person, namespace="sharma.kunal"
+    ).get_schema()
+    assert compiled.fingerprint == schema_artifacts.schema_fingerprint(compiled.schema)
+    assert set(compiled.named_types) == {
+        "sharma.kunal.Person", "sharma.kunal.GenderType", "sharma.kunal.Address"
+    }
+
+
+def test_stale_artifact_falls_back_to_schema_maker(tmp_path) -> None:
+    class Order(BaseModel):
+        oid: int
+
+    path = tmp_path / "schemas.bin"
+    compile_schema_artifacts(path, [Order])
+
+    class Order(BaseModel):  # type: ignore[no-redef]
+        oid: int
+        note: str
+
+    schema = SchemaArtifacts.load(path).get_schema(Order)
+
+    assert schema == PydanticToAvroSchemaMaker(Order).get_schema()
+
+
+def test_missing_artifacts_file(tmp_path) -> None:
+    schema = SchemaArtifacts.load(tmp_path / "missing.py").get_schema(Address)
+
+    assert schema == PydanticToAvroSchemaMaker(Address).get_schema()
+
+
+def test_structure_fingerprint_is_stable_across_processes() -> None:
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    output = subprocess.run(
+        [
+            sys.executable, "-c",
+            "from tests.unit.test_schema_artifacts import Note;"
+            "from pydantic2avro.schema_artifacts import structure_fingerprint;"
+            "print(structure_fingerprint(Note))",
+        ],
+        cwd=root,
+        env=dict(os.environ, PYTHONPATH=os.path.join(root, "src")),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+    assert output == schema_artifacts.structure_fingerprint(Note)
+
+
+def test_artifacts_of_other_package_version_are_stale(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "schemas.bin"
+    compile_schema_artifacts(path, [Address])
+
+    monkeypatch.setattr(schema_artifacts, "__version__", "0.0.0")
+
+    assert SchemaArtifacts.load(path)._artifacts == dict()
+
+
+def test_package_version_matches_pyproject() -> None:
+    import tomllib
+
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    with open(os.path.join(root, "pyproject.toml"), "rb") as fobj:
+        assert tomllib.load(fobj)["tool"]["poetry"]["version"] == __version__
+
+
+def test_artifacts_follow_model_sources(tmp_path, monkeypatch) -> None:
+    module_path = tmp_path / "artifact_models.py"
+    module_path.write_text("from pydantic import BaseModel\n\nclass Item(BaseModel):\n    sku: str\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import artifact_models  # type: ignore[import-not-found]
+    monkeypatch.setitem(sys.modules, "artifact_models", artifact_models)
+    Item = artifact_models.Item
+
+    path = tmp_path / "schemas.bin"
+    compile_schema_artifacts(path, [Item])
+
+    def is_fresh() -> bool:
+        schema_artifacts._source_digests.clear()
+        artifact = next(iter(SchemaArtifacts.load(path)._artifacts.values()))
+        return schema_artifacts._is_fresh(artifact, Item)
+
+    assert is_fresh()
+
+    # e.g. a fresh checkout of the same sources.
+    os.utime(module_path, ns=(0, 0))
+    assert is_fresh()
+
+    module_path.write_text("from pydantic import BaseModel\n\nclass Item(BaseModel):\n    sku: bytes\n")
+    assert not is_fresh()
+
+
+def test_loading_artifacts_is_faster_than_building_schemas(tmp_path) -> None:
+    path = tmp_path / "schemas.bin"
+    compile_schema_artifacts(path, [Household])
+
+    def load() -> None:
+        schema_artifacts._source_digests.clear()
+        SchemaArtifacts.load(path).get_schema(Household)
+
+    def build() -> None:
+        PydanticToAvroSchemaMaker(Household).get_schema()
+
+    def best_of(function) -> float:
+        timings = list()
+        for _ in range(20):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    assert best_of(load) < best_of(build)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import gc
+import weakref
+from datetime import date, datetime
+from enum import Enum
+from typing import Literal
+from uuid import UUID
+
+import pytest
+from pydantic import BaseModel, EmailStr, HttpUrl, IPvAnyAddress
+
+from pydantic2avro import PydanticToAvroSchemaMaker, get_union_branch_index
+from pydantic2avro.exceptions import (AmbiguousUnionException,
+                                      UnresolvableUnionBranchException)
+from pydantic2avro.union_index import annotation_key
+
+
+class DiscountOffers(str, Enum):
+    TEN_PERCENT_OFF = "TEN_PERCENT_OFF"
+    FIFTY_PERCENT_OFF = "FIFTY_PERCENT_OFF"
+
+class FreeProductOffer(str, Enum):
+    FREE_SAMPLE = "FREE_SAMPLE"
+    BUY_ONE_GET_ONE_FREE = "BUY_ONE_GET_ONE_FREE"
+
+class Manufacturer(BaseModel):
+    name: str
+    country: str
+
+
+def test_exact_type_lookup() -> None:
+    index = get_union_branch_index(
+        None | int | str | dict[str, str] | list[int] | Manufacturer
+    )
+
+    assert index.resolve(None) == 0
+    assert index.resolve(42) == 1
+    assert index.resolve("42") == 2
+    assert index.resolve({"a": "b"}) == 3
+    assert index.resolve([1, 2]) == 4
+    assert index.resolve(Manufacturer(name="foo", country="bar")) == 5
+
+
+def test_int_and_float_branches() -> None:
+    assert get_union_branch_index(int | float).resolve(1) == 0
+    assert get_union_branch_index(int | float).resolve(1.0) == 1
+    assert get_union_branch_index(None | float).resolve(1) == 1
+
+
+def test_branch_positions_follow_member_order() -> None:
+    assert get_union_branch_index(int | None).resolve(None) == 1
+    assert get_union_branch_index(None | int).resolve(None) == 0
+
+    assert get_union_branch_index(Literal["a", "b"] | None).resolve("b") == 0
+    assert get_union_branch_index(None | Literal["b", "a"]).resolve("b") == 1
+    assert annotation_key(Literal[1] | None) != annotation_key(Literal[True] | None)
+
+
+def test_index_cache_does_not_keep_models_alive() -> None:
+    class Sample(BaseModel):
+        value: int
+
+    index = get_union_branch_index(Sample | None)
+    assert get_union_branch_index(Sample | None) is index
+
+    model = weakref.ref(Sample)
+    del Sample, index
+    gc.collect()
+
+    assert model() is None
+
+
+def test_schema_keeps_its_union_indexes() -> None:
+    class Parcel(BaseModel):
+        weight: int | float
+
+    class Shipment(BaseModel):
+        note: str | None
+        parcels: list[Parcel] | None
+
+    maker = PydanticToAvroSchemaMaker(Shipment)
+    gc.collect()
+
+    index = maker.union_indexes[annotation_key(int | float)]
+    assert index.resolve(1.5) == 1
+    assert set(maker.union_indexes) == {
+        annotation_key(str | None),
+        annotation_key(list[Parcel] | None),
+        annotation_key(int | float),
+    }
+    # still shared while the maker keeps it alive.
+    assert get_union_branch_index(int | float) is index
+
+
+def test_datetime_is_not_taken_for_date() -> None:
+    index = get_union_branch_index(date | datetime)
+
+    assert index.resolve(date(1970, 1, 1)) == 0
+    assert index.resolve(datetime(1970, 1, 1)) == 1
+
+
+def test_enum_discrimination() -> None:
+    index = get_union_branch_index(DiscountOffers | FreeProductOffer)
+
+    assert index.resolve(FreeProductOffer.FREE_SAMPLE) == 1
+    assert index.resolve(DiscountOffers.TEN_PERCENT_OFF) == 0
+    assert index.resolve("BUY_ONE_GET_ONE_FREE") == 1
+
+
+def test_literal_discrimination() -> None:
+    index = get_union_branch_index(Literal["a", "b"] | Literal["c"] | None)
+
+    assert index.resolve("c") == 1
+    assert index.resolve("a") == 0
+    assert index.resolve(None) == 2
+
+    with pytest.raises(UnresolvableUnionBranchException):
+        index.resolve("d")
+
+
+def test_unresolvable_value() -> None:
+    with pytest.raises(UnresolvableUnionBranchException):
+        get_union_branch_index(int | None).resolve("42")
+
+
+def test_ambiguous_unions() -> None:
+    with pytest.raises(AmbiguousUnionException):
+        get_union_branch_index(str | EmailStr)
+
+    with pytest.raises(AmbiguousUnionException):
+        get_union_branch_index(Literal["a"] | str)
+
+    with pytest.raises(AmbiguousUnionException):
+        get_union_branch_index(Literal["a"] | Literal["a", "b"])
+
+
+def test_ambiguous_union_fails_schema_build() -> None:
+    class Contact(BaseModel):
+        handle: str | EmailStr
+
+    with pytest.raises(AmbiguousUnionException):
+        PydanticToAvroSchemaMaker(Contact).get_schema()
+
+
+@pytest.mark.parametrize("annotation", [
+    str | HttpUrl,
+    str | IPvAnyAddress,
+    HttpUrl | IPvAnyAddress | None,
+    UUID | str,
+    datetime | int,
+])
+def test_unions_of_same_avro_type_fail_schema_build(annotation) -> None:
+    class Endpoint(BaseModel):
+        target: annotation  # type: ignore[valid-type]
+
+    with pytest.raises(AmbiguousUnionException):
+        PydanticToAvroSchemaMaker(Endpoint).get_schema()